@@ -0,0 +1,608 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+import asyncio
+import json
+import os
+import tempfile
+import tracemalloc
+
+from time import sleep
+from timeit import timeit, default_timer as timer
+
+import numpy as np
+import requests
+
+from colimit import gpx, Location, LocationArray, Way, WayRegistry, \
+    WayCache, WayTable, Connection, AsyncConnection
+from colimit.codec import dumps, loads
+from colimit.geometry import GEOMETRIES, Haversine
+from colimit.graph import WayGraph
+from colimit.index import WayIndex, SegmentIndex
+from colimit.server import LimitsServer
+
+GPX_FILE = os.path.join('colimit', 'da.gpx')
+
+
+def _row(name, value, unit):
+    print('  %-32s %12.3f %s' % (name, value, unit))
+
+
+def location_benchmark(gpx_file=GPX_FILE, number=100):
+    """ memory per |Location| instance and latency per clone """
+    print('Location with %s' % gpx_file)
+
+    start = timer()
+    locations = gpx(gpx_file)
+    _row('gpx import', (timer() - start) * 1e3, 'ms')
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    clones = [loc.clone() for loc in locations]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _row('memory per instance', (after - before) / len(clones), 'bytes')
+
+    def clone():
+        for loc in locations:
+            loc.clone()
+
+    def clone_by_constructor():
+        # clone as built before by the constructor
+        for loc in locations:
+            loc_dict = loc._dict
+            loc.__class__(**loc_dict)
+
+    def clone_with_overrides():
+        for loc in locations:
+            loc.clone(latitude=0.0, timedelta=1.0)
+
+    def step():
+        for loc in locations:
+            loc.next()
+
+    n = number * len(locations)
+    _row('clone by constructor',
+         timeit(clone_by_constructor, number=number) / n * 1e6, 'us')
+    _row('clone', timeit(clone, number=number) / n * 1e6, 'us')
+    _row('clone with overrides',
+         timeit(clone_with_overrides, number=number) / n * 1e6, 'us')
+    _row('next', timeit(step, number=number) / n * 1e6, 'us')
+
+
+def geometry_benchmark(size=100000, max_distance=5000., number=5):
+    """ throughput against error in meters of geometry engines
+
+    The error is measured against great circle distances (|Haversine|)
+    for random pairs of coordinates around Darmstadt
+    with distances up to **max_distance** meters.
+    """
+    print('Geometry with %d pairs up to %0.0fm' % (size, max_distance))
+    rng = np.random.default_rng(0)
+    lat = 49.87 + rng.uniform(-0.1, 0.1, size)
+    lon = 8.64 + rng.uniform(-0.1, 0.1, size)
+    dist = rng.uniform(0., max_distance, size)
+    drc = rng.uniform(0., 360., size)
+    w, z = Haversine.xy_array(lat, lon, dist, drc)
+    pairs = tuple(zip(lat[:1000], lon[:1000], w[:1000], z[:1000]))
+
+    print('  %-16s %14s %14s %12s %12s' %
+          ('geometry', 'scalar pts/s', 'array pts/s', 'max err m',
+           'mean err m'))
+    for name, geometry in GEOMETRIES.items():
+        def scalar():
+            for pair in pairs:
+                geometry.polar(*pair)
+
+        def array():
+            geometry.polar_array(lat, lon, w, z)
+
+        scalar_rate = number * len(pairs) / timeit(scalar, number=number)
+        array_rate = number * size / timeit(array, number=number)
+        err = np.abs(geometry.polar_array(lat, lon, w, z)[0] - dist)
+        print('  %-16s %14.0f %14.0f %12.4f %12.4f' %
+              (name, scalar_rate, array_rate, err.max(), err.mean()))
+
+
+def bounds_benchmark(gpx_file=GPX_FILE, number=100):
+    """ bounding box over a track by |Location| and |LocationArray| """
+    print('Bounds with %s' % gpx_file)
+    locations = gpx(gpx_file)
+    arr = LocationArray.from_locations(*locations)
+    n = number * len(locations)
+
+    def diameter():
+        Location.diameter(*locations)
+
+    def bounds():
+        Location.diameter(bounds=Location.bounds(*locations))
+
+    def array():
+        Location.diameter(bounds=arr.bounds())
+
+    def many():
+        arr.bounds(offsets=range(0, len(arr), 10))
+
+    _row('Location.diameter', timeit(diameter, number=number) / n * 1e9, 'ns')
+    _row('Location.bounds', timeit(bounds, number=number) / n * 1e9, 'ns')
+    _row('LocationArray.bounds', timeit(array, number=number) / n * 1e9, 'ns')
+    _row('LocationArray.bounds (offsets)',
+         timeit(many, number=number) / n * 1e9, 'ns')
+
+
+def rollout_benchmark(steps=100, number=100):
+    """ predicted trajectory by |Location().next()| and rollout """
+    print('Rollout with %d steps' % steps)
+    loc = Location(49.86722, 8.638495, 13.9, 45., timedelta=1.)
+    times = np.arange(1, steps + 1) * 0.1
+
+    def chain():
+        g = loc
+        for _ in range(steps):
+            g = g.next(timedelta=0.1)
+
+    def rollout():
+        loc.rollout(times)
+
+    def turn():
+        loc.rollout(times, turn_rate=5., acceleration=0.5)
+
+    n = number * steps
+    _row('chained next', timeit(chain, number=number) / n * 1e9, 'ns')
+    _row('rollout', timeit(rollout, number=number) / n * 1e9, 'ns')
+    _row('rollout with turn and acceleration',
+         timeit(turn, number=number) / n * 1e9, 'ns')
+
+
+def codec_benchmark(gpx_file=GPX_FILE, number=100):
+    """ size and speed of binary encoding of a track compared to json """
+    print('Codec with %s' % gpx_file)
+    locations = gpx(gpx_file)
+    arr = LocationArray.from_locations(*locations)
+
+    text = json.dumps([loc.json for loc in locations])
+    _row('json size', len(text) / 1e3, 'kB')
+    _row('json encode', timeit(lambda: json.dumps(
+        [loc.json for loc in locations]), number=number) / number * 1e3, 'ms')
+    _row('json decode', timeit(
+        lambda: json.loads(text), number=number) / number * 1e3, 'ms')
+
+    for delta, compress in ((False, False), (True, False), (True, True)):
+        name = 'binary' + (' delta' if delta else '') + \
+            (' zlib' if compress else '')
+        data = dumps(arr, delta, compress)
+        _row(name + ' size', len(data) / 1e3, 'kB')
+        _row(name + ' encode', timeit(lambda: dumps(
+            arr, delta, compress), number=number) / number * 1e3, 'ms')
+        _row(name + ' decode', timeit(
+            lambda: loads(data), number=number) / number * 1e3, 'ms')
+
+
+def measure_benchmark(gpx_file=GPX_FILE, number=1000):
+    """ point at distance along a way by summing segments and bisection """
+    print('Measure with %s' % gpx_file)
+    way = Way(geometry=gpx(gpx_file))
+    measure = way.distances[-1] * 0.75
+
+    def loop():
+        geometry, d = way.geometry, 0.0
+        for s, e in zip(geometry[:-1], geometry[1:]):
+            step = s.dist(e)
+            if measure <= d + step:
+                return s.next(measure - d, s.dir(e))
+            d += step
+
+    measures = np.linspace(0., way.distances[-1], 1000)
+    located = way.interpolate(measures)
+
+    _row('summing segments', timeit(loop, number=10) / 10 * 1e6, 'us')
+    _row('interpolate', timeit(
+        lambda: way.interpolate(measure), number=number) / number * 1e6, 'us')
+    _row('interpolate (batch per point)', timeit(
+        lambda: way.interpolate(measures), number=10) / 1e4 * 1e6, 'us')
+    _row('locate (batch per point)', timeit(
+        lambda: way.locate(located), number=10) / 1e4 * 1e6, 'us')
+
+
+def registry_benchmark(size=2000, shift=100, steps=20):
+    """ consecutive overlapping |Connection().get_ways()| results """
+    print('Registry with %d ways shifted by %d' % (size, shift))
+    payload = _ways_payload(size + shift * steps)
+    results = [payload[i * shift:i * shift + size] for i in range(steps)]
+
+    def session(registry=None):
+        kept = list()
+        for result in results:
+            ways = registry(result) if registry is not None else \
+                tuple(Way(**w) for w in result)
+            for way in ways:
+                way.segments
+            kept.append(ways)
+        return kept
+
+    for name, registry in (('fresh ways', None),
+                           ('registry', WayRegistry(maxsize=2 * size))):
+        tracemalloc.start()
+        start = timer()
+        kept = session(registry)
+        elapsed = timer() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _row(name + ' per result', elapsed / steps * 1e3, 'ms')
+        _row(name + ' memory', current / 1e6, 'MB')
+        del kept
+
+
+def simplify_benchmark(gpx_file=GPX_FILE, tolerances=(1., 5., 25.),
+                       number=10):
+    """ vertex count and projection time by levels of detail """
+    print('Simplify with %s' % gpx_file)
+    locations = gpx(gpx_file)
+    track = LocationArray.from_locations(*locations)
+    way = Way(geometry=locations)
+
+    start = timer()
+    way.significance
+    _row('significance', (timer() - start) * 1e3, 'ms')
+    _row('full nodes', len(way), '')
+    _row('full project', timeit(lambda: way.project(track),
+                                number=number) / number * 1e3, 'ms')
+    for tolerance in tolerances:
+        coarse = way.simplify(tolerance)
+        name = '%0.0fm' % tolerance
+        _row(name + ' nodes', len(coarse), '')
+        _row(name + ' project', timeit(lambda: coarse.project(track),
+                                       number=number) / number * 1e3, 'ms')
+
+
+def _grid_ways(size=100):
+    """ street grid of one block ways with every third street oneway """
+    ways = list()
+    for r in range(size):
+        for c in range(size - 1):
+            a, b = r * size + c + 1, r * size + c + 2
+            ways.append(Way(id=len(ways) + 1, nodes=(a, b),
+                            oneway=r % 3 == 0))
+            a, b = c * size + r + 1, (c + 1) * size + r + 1
+            ways.append(Way(id=len(ways) + 1, nodes=(a, b),
+                            oneway=r % 3 == 1))
+    return ways
+
+
+def graph_benchmark(size=100, number=1000):
+    """ connectivity of ways in a street grid by scan and |WayGraph| """
+    ways = _grid_ways(size)
+    print('Graph with %d ways' % len(ways))
+
+    def scan(way):
+        return tuple(w for w in ways if w is not way and
+                     set(w.nodes[:-1] if w.oneway else w.nodes)
+                     .intersection(way.nodes))
+
+    start = timer()
+    graph = WayGraph(ways)
+    _row('build', (timer() - start) * 1e3, 'ms')
+    queries = ways[::len(ways) // 10]
+    _row('successors by scan', timeit(
+        lambda: [scan(w) for w in queries], number=1) / 10 * 1e3, 'ms')
+    _row('successors', timeit(lambda: [graph.successors(w) for w in queries],
+                              number=number) / number / 10 * 1e6, 'us')
+    _row('bfs depth 5', timeit(lambda: [graph.bfs(w, 5) for w in queries],
+                               number=10) / 100 * 1e6, 'us')
+
+
+def _random_ways(size, nodes=3, seed=0):
+    """ short ways spread with constant density around Darmstadt """
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(size) * 2e-3
+    lat = 49.87 + rng.uniform(-side, side, (size, 1)) + \
+        np.cumsum(rng.uniform(-5e-4, 5e-4, (size, nodes)), axis=1)
+    lon = 8.64 + rng.uniform(-side, side, (size, 1)) * 1.5 + \
+        np.cumsum(rng.uniform(-7e-4, 7e-4, (size, nodes)), axis=1)
+    return [Way(id=i + 1, geometry=[{'latitude': a, 'longitude': b}
+                                    for a, b in zip(la, lo)])
+            for i, (la, lo) in enumerate(zip(lat.tolist(), lon.tolist()))]
+
+
+def index_benchmark(sizes=(100, 1000, 10000, 100000, 1000000), number=100):
+    """ bbox, radius and nearest queries by scan and |WayIndex| """
+    print('Index with up to %d ways' % max(sizes))
+    print('  %-10s %10s %12s %12s %12s %12s' %
+          ('ways', 'build ms', 'scan us', 'bbox us', 'radius us',
+           'nearest us'))
+    loc = Location(49.87, 8.64)
+    south, west, north, east = Location.bounds(loc, radius=250.)
+    for size in sizes:
+        ways = _random_ways(size)
+        for way in ways:
+            way.bounds
+
+        def scan():
+            return [w for w in ways if w.bounds[0] <= north and
+                    south <= w.bounds[2] and w.bounds[1] <= east and
+                    west <= w.bounds[3]]
+
+        start = timer()
+        index = WayIndex(ways)
+        build = timer() - start
+        n = max(1, number * 100 // size)
+        print('  %-10d %10.1f %12.1f %12.1f %12.1f %12.1f' % (
+            size, build * 1e3,
+            timeit(scan, number=n) / n * 1e6,
+            timeit(lambda: index.bbox(south, west, north, east),
+                   number=number) / number * 1e6,
+            timeit(lambda: index.radius(loc, 250.),
+                   number=number) / number * 1e6,
+            timeit(lambda: index.nearest(loc, 5),
+                   number=number) / number * 1e6))
+
+
+def segment_benchmark(size=10000, long=200, nodes=200, number=100):
+    """ radius and nearest queries with long ways by way and segment index """
+    print('Segment index with %d short and %d long ways' % (size, long))
+    rng = np.random.default_rng(1)
+    side = np.sqrt(size) * 2e-3
+    ways = _random_ways(size)
+    for i in range(long):
+        start = Location(49.87 + rng.uniform(-side, side),
+                         8.64 + rng.uniform(-side, side) * 1.5)
+        drc = rng.uniform(0., 360.)
+        ways.append(Way(id=size + i + 1, geometry=[
+            start.next(j * 300., drc) for j in range(nodes)]))
+    loc = Location(49.87, 8.64)
+
+    for name, cls in (('WayIndex', WayIndex), ('SegmentIndex', SegmentIndex)):
+        start = timer()
+        index = cls(ways)
+        _row(name + ' build', (timer() - start) * 1e3, 'ms')
+        _row(name + ' radius', timeit(lambda: index.radius(loc, 250.),
+                                      number=number) / number * 1e6, 'us')
+        _row(name + ' nearest', timeit(lambda: index.nearest(loc, 5),
+                                       number=number) / number * 1e6, 'us')
+
+
+def _ways_payload(size=2000, nodes=12, seed=0):
+    """ synthetic |Connection().get_ways()| response around Darmstadt """
+    rng = np.random.default_rng(seed)
+    ways = list()
+    for i in range(size):
+        lat = 49.87 + rng.uniform(-0.05, 0.05) + \
+            np.cumsum(rng.uniform(-2e-4, 2e-4, nodes))
+        lon = 8.64 + rng.uniform(-0.05, 0.05) + \
+            np.cumsum(rng.uniform(-3e-4, 3e-4, nodes))
+        ids = range(i * nodes + 1, (i + 1) * nodes + 1)
+        ways.append({
+            'id': i + 1,
+            'nodes': list(ids),
+            'geometry': [{'latitude': float(a), 'longitude': float(b),
+                          'id': n} for a, b, n in zip(lat, lon, ids)],
+            'oneway': bool(i % 3 == 0),
+            'limit': float(rng.choice((30., 50., 70., 100.))),
+            'tags': {'highway': 'residential'}
+        })
+    return ways
+
+
+def table_benchmark(size=20000):
+    """ decode time and peak memory of a large |Connection().get_ways()| """
+    print('Table with %d ways' % size)
+    payload = _ways_payload(size)
+
+    def eager():
+        ways = tuple(Way(**w) for w in payload)
+        for way in ways:
+            way.geometry
+        return ways
+
+    def lazy():
+        ways = tuple(Way(**w) for w in payload)
+        for way in ways:
+            way.coordinates
+        return ways
+
+    for name, decode in (('ways with geometry', eager),
+                         ('ways with coordinates', lazy),
+                         ('table', lambda: WayTable(payload))):
+        _row(name + ' decode', timeit(decode, number=1) * 1e3, 'ms')
+        tracemalloc.start()
+        result = decode()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _row(name + ' peak memory', peak / 1e6, 'MB')
+        del result
+
+
+def way_benchmark(size=2000, candidates=10, number=10):
+    """ turning a |Connection().get_ways()| response into |Way| objects """
+    print('Way with %d ways' % size)
+    payload = _ways_payload(size)
+
+    def build():
+        return tuple(Way(**w) for w in payload)
+
+    def candidate():
+        ways = build()
+        for way in ways[:candidates]:
+            way.segments
+
+    def full():
+        for way in build():
+            way.segments
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    ways = build()
+    after, _ = tracemalloc.get_traced_memory()
+    for way in ways:
+        way.segments
+    full_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    _row('construct', timeit(build, number=number) / number * 1e3, 'ms')
+    _row('construct, %d segments' % candidates,
+         timeit(candidate, number=number) / number * 1e3, 'ms')
+    _row('construct, all segments',
+         timeit(full, number=number) / number * 1e3, 'ms')
+    _row('memory constructed', (after - before) / 1e3, 'kB')
+    _row('memory all segments', (full_size - before) / 1e3, 'kB')
+
+    def score():
+        for way in ways:
+            way.length, way.bounds
+
+    _row('length and bounds (first)',
+         timeit(score, number=1) / size * 1e6, 'us')
+    _row('length and bounds (repeated)',
+         timeit(score, number=number) / number / size * 1e6, 'us')
+
+    def dedupe():
+        set(ways)
+
+    def membership():
+        for way in ways[-candidates:]:
+            way in ways
+
+    _row('hash (set of ways)', timeit(dedupe, number=number) / number / size
+         * 1e6, 'us')
+    _row('membership in list of ways', timeit(
+        membership, number=1) / candidates * 1e3, 'ms')
+
+
+def connection_benchmark(size=200, number=200):
+    """ latency per request to a local |LimitsServer| """
+    print('Connection to local server with %d ways' % size)
+    kwargs = {'latitude': 49.87, 'longitude': 8.64, 'radius': 100.}
+    with LimitsServer(_ways_payload(size)) as server:
+        root = '%s:%d/' % (server.url, server.port)
+        url = root + 'get_ways'
+
+        with Connection('benchmark', url=server.url, port=server.port) as ci:
+            for name, session in (('new connection', requests),
+                                  ('pooled session', ci.session)):
+                _row(name + ' ping', timeit(
+                    lambda: session.get(root),
+                    number=number) / number * 1e6, 'us')
+                _row(name + ' get_ways', timeit(
+                    lambda: session.post(url, json=kwargs).json(),
+                    number=number) / number * 1e6, 'us')
+
+
+def async_benchmark(size=40, delay=0.01, concurrency=10):
+    """ |AsyncConnection| against a |LimitsServer| with slow `get_limit` """
+    print('AsyncConnection for %d requests with %d ms server delay'
+          % (size, delay * 1e3))
+
+    def get_limit(latitude, get_ways, **kwargs):
+        sleep(delay)
+        return latitude, ()
+
+    async def gather(ac, locations):
+        return await ac.gather(locations)
+
+    locations = [Location(latitude=49.87 + i * 1e-4, longitude=8.64)
+                 for i in range(size)]
+    with LimitsServer(get_limit=get_limit) as server:
+        with Connection('benchmark', url=server.url, port=server.port) as ci:
+            _row('sequential', timeit(
+                lambda: [ci.get_limit(location=g) for g in locations],
+                number=1) * 1e3, 'ms')
+        ac = AsyncConnection('benchmark', url=server.url, port=server.port,
+                             concurrency=concurrency)
+        _row('async (concurrency %d)' % concurrency, timeit(
+            lambda: asyncio.run(gather(ac, locations)),
+            number=1) * 1e3, 'ms')
+        ac.close()
+
+
+def get_limits_benchmark(size=2000, chunk_sizes=(1, 10, 100, 1000)):
+    """ |Connection().get_limits()| by chunk size
+        against a local |LimitsServer| """
+    print('Connection.get_limits for %d locations' % size)
+    locations = [Location(latitude=49.87 + i * 1e-5, longitude=8.64)
+                 for i in range(size)]
+    with LimitsServer(get_limit=lambda latitude, **kwargs: latitude) \
+            as server:
+        with Connection('benchmark', url=server.url, port=server.port) as ci:
+            _row('get_limit', timeit(
+                lambda: [ci.get_limit(location=g) for g in locations],
+                number=1) * 1e3, 'ms')
+            for chunk_size in chunk_sizes:
+                _row('get_limits (chunk_size %d)' % chunk_size, timeit(
+                    lambda: list(ci.get_limits(locations, chunk_size)),
+                    number=1) * 1e3, 'ms')
+
+
+def tile_cache_benchmark(size=5000, steps=300, radius=100.,
+                         zooms=(14, 15, 16, 17)):
+    """ requests and time of |Connection().get_ways()| along a trace
+        with exact and tile based file cache """
+    print('Connection.get_ways file cache along a trace of %d locations'
+          % steps)
+    trace = [(49.86 + i * 1e-4, 8.62 + i * 1e-4) for i in range(steps)]
+    with LimitsServer(_ways_payload(size)) as server, \
+            Connection('benchmark', url=server.url, port=server.port) as ci:
+        get_ways, calls = server.get_ways, list()
+        server.get_ways = lambda **kw: calls.append(kw) or get_ways(**kw)
+        for zoom in (None,) + tuple(zooms):
+            with tempfile.TemporaryDirectory() as file_cache:
+                del calls[:]
+                start = timer()
+                for lat, lon in trace:
+                    ci.get_ways(latitude=lat, longitude=lon, radius=radius,
+                                file_cache=file_cache, zoom=zoom)
+                name = 'exact' if zoom is None else 'zoom %d' % zoom
+                _row(name + ' requests', len(calls), '')
+                _row(name + ' time', (timer() - start) * 1e3, 'ms')
+
+
+def cache_benchmark(size=2000, number=100, zoom=16):
+    """ repeated |Connection().get_ways()| from server, file and memory """
+    print('Connection.get_ways repeated with %d ways' % size)
+    kwargs = {'latitude': 49.87, 'longitude': 8.64, 'radius': 250.}
+    with LimitsServer(_ways_payload(size)) as server, \
+            tempfile.TemporaryDirectory() as file_cache:
+        for name, cache, file_cache in (
+                ('server', None, ''),
+                ('file cache', None, file_cache),
+                ('memory cache', WayCache(), file_cache)):
+            with Connection('benchmark', url=server.url, port=server.port,
+                            cache=cache) as ci:
+                ci.get_ways(**kwargs, file_cache=file_cache)
+                _row(name, timeit(
+                    lambda: ci.get_ways(**kwargs, file_cache=file_cache),
+                    number=number) / number * 1e6, 'us')
+                ci.get_ways(**kwargs, file_cache=file_cache, zoom=zoom)
+                _row(name + ' (zoom %d)' % zoom, timeit(
+                    lambda: ci.get_ways(**kwargs, file_cache=file_cache,
+                                        zoom=zoom),
+                    number=number) / number * 1e6, 'us')
+
+
+if __name__ == '__main__':
+    location_benchmark()
+    geometry_benchmark()
+    bounds_benchmark()
+    rollout_benchmark()
+    codec_benchmark()
+    way_benchmark()
+    table_benchmark()
+    measure_benchmark()
+    simplify_benchmark()
+    registry_benchmark()
+    graph_benchmark()
+    index_benchmark()
+    segment_benchmark()
+    connection_benchmark()
+    async_benchmark()
+    get_limits_benchmark()
+    tile_cache_benchmark()
+    cache_benchmark()
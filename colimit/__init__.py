@@ -25,18 +25,24 @@ __date__ = 'Tuesday, 29 March 2022'
 __version__ = '0.1.12'
 __dev_status__ = '4 - Beta'
 
-__dependencies__ = 'requests', 'pandas', 'geopandas', 'contextily', \
-    'matplotlib', 'bs4'
+__dependencies__ = 'requests', 'numpy', 'pandas', 'geopandas', \
+    'contextily', 'matplotlib', 'bs4'
 __dependency_links__ = ()
 __data__ = "*.zip", "*.gpx"
 __scripts__ = ()
 __theme__ = 'sphinx_rtd_theme'
 
 
-from .limits import Connection  # noqa E402
-from .location import Location  # noqa E402
-from .speed import Speed  # noqa E402
+from .cache import WayCache  # noqa E402
+from .geometry import LocalFrame  # noqa E402
+from .limits import Connection, AsyncConnection  # noqa E402
+from .location import Location, LocationArray  # noqa E402
+from .registry import WayRegistry  # noqa E402
+from .speed import Speed, SpeedArray  # noqa E402
+from .table import WayTable  # noqa E402
 from .testing import gpx, test  # noqa E402
 from .way import Way  # noqa E402
 
-__all__ = 'Speed', 'Location', 'Way', 'Connection', 'gpx', 'test'
+__all__ = 'Speed', 'SpeedArray', 'Location', 'LocationArray', 'LocalFrame', \
+    'Way', 'WayRegistry', 'WayCache', 'WayTable', 'Connection', \
+    'AsyncConnection', 'gpx', 'test'
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from time import monotonic
+
+from .table import WayTable
+
+__all__ = 'WayCache',
+
+MAXSIZE = 1024
+MAXBYTES = 64 * 2 ** 20
+WAY_BYTES = 512
+NODE_BYTES = 256
+
+
+def _sizeof(value):
+    # rough estimate of the memory held by a result of `get_ways`
+    if isinstance(value, WayTable):
+        return sum(a.nbytes for a in (
+            value.ids, value.limits, value.oneway, value.variable,
+            value.conditional, value.offsets, value.nodes,
+            value.latitude, value.longitude)) + WAY_BYTES * len(value)
+    return sum(WAY_BYTES + NODE_BYTES * len(w) for w in value)
+
+
+class WayCache(object):
+
+    def __init__(self, maxsize=MAXSIZE, maxbytes=MAXBYTES, ttl=None,
+                 sizeof=None):
+        """ in memory cache of |Connection().get_ways()| results
+
+        :param maxsize: maximal number of results to keep
+            (optional, default is 1024)
+        :param maxbytes: maximal number of bytes of all results to keep
+            (optional, default is 64 MB)
+        :param ttl: seconds to keep a result
+            (optional, default **None** keeps results until evicted)
+        :param sizeof: function to estimate the bytes of a result
+            (optional, by default a fixed size per way and node
+            or the size of the arrays of a |WayTable|)
+
+        Results are the already built :class:`tuple` (|Way|)
+        (or |WayTable|), so a cache hit neither downloads,
+        nor reads files nor builds any |Way|.
+
+        If more than **maxsize** results or more than **maxbytes**
+        are stored, the least recently used results are evicted.
+        Results older than **ttl** seconds are dropped on access.
+
+        A |Connection| given a |WayCache| as **cache**
+        asks it first in |Connection().get_ways()|,
+        i.e. before the **file_cache** and the server.
+        Any other `get_ways` function can be wrapped
+        by calling the cache with it,
+        e.g. the one given to `get_limit` code by |test()|
+        with a |WayCache| as **way_cache**.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> from colimit.cache import WayCache
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> def get_ways(**kwargs):
+            ...     print('download')
+            ...     return Way(id=1, geometry=(a, b)),
+            >>> cache = WayCache(maxsize=100, ttl=60.)
+            >>> get_ways = cache(get_ways)
+            >>> get_ways(latitude=49.867, longitude=8.638, radius=50.)
+            download
+            (Way(1),)
+            >>> get_ways(latitude=49.867, longitude=8.638, radius=50.)
+            (Way(1),)
+            >>> cache.hits, cache.misses, cache.evictions
+            (1, 1, 0)
+
+        """
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._ttl = ttl
+        self._sizeof = sizeof or _sizeof
+        self._items = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self):
+        """ maximal number of results to keep """
+        return self._maxsize
+
+    @property
+    def maxbytes(self):
+        """ maximal number of bytes of all results to keep """
+        return self._maxbytes
+
+    @property
+    def ttl(self):
+        """ seconds to keep a result """
+        return self._ttl
+
+    @property
+    def nbytes(self):
+        """ estimated bytes of all results """
+        return self._nbytes
+
+    @staticmethod
+    def key(*args, **kwargs):
+        """ cache key of `get_ways` arguments
+
+        :param args: positional arguments of `get_ways`
+        :param kwargs: keyword arguments of `get_ways`
+        :return: :class:`tuple` of **args** and sorted **kwargs** items
+            without arguments of **None**
+        """
+        return args + tuple(sorted((k, v) for k, v in kwargs.items()
+                                   if v is not None))
+
+    def get(self, key, default=None):
+        """ cached result
+
+        :param key: cache key (see |WayCache().key()|)
+        :param default: value returned on a cache miss
+            (optional, default **None**)
+        :return: cached result or **default**
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and self._expired(item):
+                self._drop(key)
+                self.evictions += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        """ adds a result to the cache
+
+        :param key: cache key (see |WayCache().key()|)
+        :param value: result to cache
+
+        Results larger than **maxbytes** are not stored.
+        """
+        nbytes = self._sizeof(value)
+        if self._maxbytes is not None and self._maxbytes < nbytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = value, nbytes, monotonic()
+            self._nbytes += nbytes
+            while self._maxsize < len(self._items) or \
+                    self._maxbytes is not None and \
+                    self._maxbytes < self._nbytes:
+                self._drop(next(iter(self._items)))
+                self.evictions += 1
+
+    def clear(self):
+        """ drops all results """
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+    def _expired(self, item):
+        return self._ttl is not None and self._ttl < monotonic() - item[2]
+
+    def _drop(self, key):
+        _, nbytes, _ = self._items.pop(key)
+        self._nbytes -= nbytes
+
+    def __call__(self, get_ways):
+        """ `get_ways` function with results cached by its arguments """
+
+        @wraps(get_ways)
+        def cached_get_ways(*args, **kwargs):
+            key = self.key(*args, **kwargs)
+            result = self.get(key)
+            if result is None:
+                result = get_ways(*args, **kwargs)
+                self.put(key, result)
+            return result
+
+        return cached_get_ways
+
+    def __contains__(self, key):
+        # membership neither counts as hit or miss nor moves the result
+        with self._lock:
+            item = self._items.get(key)
+            return item is not None and not self._expired(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return "%s(%d/%d)" % \
+            (self.__class__.__name__, len(self._items), self._maxsize)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from .location import LocationArray
+
+__all__ = 'dumps', 'loads', 'dump', 'load'
+
+MAGIC = b'CLMT'
+VERSION = 1
+DELTA = 1
+ZLIB = 2
+SCALE = 1e7  # delta encoded coordinates in 1e-7 degrees (about 1cm)
+
+_HEADER = struct.Struct('<4sBBHQ')
+_I4_MAX = np.iinfo(np.int32).max
+
+
+def _columns(locations):
+    if not isinstance(locations, LocationArray):
+        locations = LocationArray.from_locations(*locations)
+    return locations
+
+
+def dumps(locations, delta=False, compress=False):
+    """ encodes locations into compact binary columns
+
+    :param locations: |LocationArray| or sequence of |Location|
+    :param delta: bool, if **True** coordinates are quantized
+        to 1e-7 degrees (about 1cm) and coordinates and times
+        are delta-encoded (optional, default **False**)
+        If a coordinate delta exceeds 32 bit
+        (a jump of more than about 214 degrees,
+        e.g. across the antimeridian),
+        locations are stored without **delta**.
+    :param compress: bool or zlib level to compress the columns
+        (optional, default **False**)
+    :return: :class:`bytes`
+
+    The encoding starts with a 16 bytes header
+    (magic `CLMT`, version, flags and number of locations)
+    followed by fixed-width little-endian columns
+    of **latitude**, **longitude**, **speed**, **direction**,
+    **timedelta** (seconds), **time** (microseconds since epoch)
+    and **id**.
+
+    Without **delta** and **compress** |loads()| reads the columns
+    without copying them.
+
+    .. code-block:: python
+
+        >>> from colimit import Location
+        >>> from colimit.codec import dumps, loads
+        >>> h_da = Location(latitude=49.86722, longitude=8.638495)
+        >>> tu_da = Location(latitude=49.87515, longitude=8.658122)
+        >>> data = dumps((h_da, tu_da))
+        >>> len(data)
+        128
+        >>> loads(data)[1] == tu_da
+        True
+
+    """
+    arr = _columns(locations)
+    n = len(arr)
+    time = arr.time.astype('<i8')
+    if delta:
+        lat = np.round(arr.latitude * SCALE).astype('<i8')
+        lon = np.round(arr.longitude * SCALE).astype('<i8')
+        # store first values as base and deltas to them
+        base = np.array((lat[:1].sum(), lon[:1].sum(), time[:1].sum()),
+                        dtype='<i8')
+        d_lat = np.diff(lat, prepend=base[0])
+        d_lon = np.diff(lon, prepend=base[1])
+        # fall back to absolute coordinates if deltas overflow int32
+        delta = all(np.all(np.abs(d) <= _I4_MAX) for d in (d_lat, d_lon))
+    if delta:
+        columns = (base, d_lat.astype('<i4'), d_lon.astype('<i4'),
+                   np.diff(time, prepend=base[2]))
+    else:
+        columns = (arr.latitude.astype('<f8'), arr.longitude.astype('<f8'),
+                   time)
+    columns += (arr.speed.astype('<f8'), arr.direction.astype('<f8'),
+                arr.timedelta.astype('<f8'), arr.id.astype('<i8'))
+    payload = b''.join(c.tobytes() for c in columns)
+
+    flags = (DELTA if delta else 0) | (ZLIB if compress else 0)
+    if compress:
+        level = -1 if compress is True else int(compress)
+        payload = zlib.compress(payload, level)
+    return _HEADER.pack(MAGIC, VERSION, flags, 0, n) + payload
+
+
+def loads(data):
+    """ decodes locations from binary columns given by |dumps()|
+
+    :param data: :class:`bytes` or any buffer
+        (e.g. :class:`memoryview` or :class:`mmap.mmap`)
+    :return: |LocationArray|
+
+    If **data** was encoded without **delta** and **compress**
+    the columns of the resulting |LocationArray| are
+    read-only views into **data**.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError('data is not a colimit location encoding')
+    magic, version, flags, _, n = _HEADER.unpack_from(data)
+    if not magic == MAGIC:
+        raise ValueError('data is not a colimit location encoding')
+    if VERSION < version:
+        raise ValueError('encoding version %d not supported' % version)
+
+    buffer = memoryview(data)[_HEADER.size:]
+    if flags & ZLIB:
+        buffer = zlib.decompress(buffer)
+
+    offset = 0
+
+    def column(dtype):
+        nonlocal offset
+        c = np.frombuffer(buffer, dtype=dtype, count=n, offset=offset)
+        offset += c.nbytes
+        return c
+
+    if flags & DELTA:
+        base = np.frombuffer(buffer, dtype='<i8', count=3)
+        offset = base.nbytes
+        lat = (base[0] + np.cumsum(column('<i4'), dtype=np.int64)) / SCALE
+        lon = (base[1] + np.cumsum(column('<i4'), dtype=np.int64)) / SCALE
+        time = (base[2] + np.cumsum(column('<i8'))).view('datetime64[us]')
+    else:
+        lat, lon = column('<f8'), column('<f8')
+        time = column('<i8').view('datetime64[us]')
+    return LocationArray(latitude=lat,
+                         longitude=lon,
+                         time=time,
+                         speed=column('<f8'),
+                         direction=column('<f8'),
+                         timedelta=column('<f8'),
+                         id=column('<i8'))
+
+
+def dump(locations, file, delta=False, compress=False):
+    """ writes locations into file (see |dumps()|)
+
+    :param locations: |LocationArray| or sequence of |Location|
+    :param file: path or binary file object
+    :param delta: see |dumps()|
+    :param compress: see |dumps()|
+    """
+    data = dumps(locations, delta=delta, compress=compress)
+    if hasattr(file, 'write'):
+        file.write(data)
+    else:
+        with open(file, 'wb') as f:
+            f.write(data)
+
+
+def load(file):
+    """ reads locations from file (see |loads()|)
+
+    :param file: path to file written by |dump()|
+    :return: |LocationArray|
+
+    The file is memory mapped, so uncompressed columns
+    are read on demand without copying them.
+    """
+    with open(file, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise ValueError('empty file %s' % file)
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(data)
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+from math import sqrt, sin, cos, asin, atan2, radians, degrees, acos
+
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+__all__ = 'Planar', 'Equirectangular', 'Haversine', 'Tangent', \
+    'GEOMETRIES', 'get_geometry', 'LocalFrame'
+
+EARTH_RADIUS = 6378137.
+METER_PER_DEGREE = radians(EARTH_RADIUS)
+
+_cap = (lambda x: max(-1.0, min(x, 1.0)))
+
+
+class Planar(object):
+    """ planar geometry treating degrees of latitude and longitude
+        as equally long (fast but distorted with increasing latitude) """
+
+    @staticmethod
+    def xy(latitude, longitude, distance, direction):
+        """ function to transform location coordinate
+            with distance and direction
+            into location coordinate
+
+        :param latitude: location latitude in degrees
+        :param longitude: location longitude in degrees
+        :param distance: distance in meters
+        :param direction: direction in degrees north
+        :return: (latitude, longitude)
+        """
+        phi = radians(direction)
+        w = latitude + degrees(distance * cos(phi) / EARTH_RADIUS)
+        z = longitude + degrees(distance * sin(phi) / EARTH_RADIUS)
+        return w, z
+
+    @staticmethod
+    def polar(latitude, longitude, lat, lon):
+        """ function to transform two location coordinate
+            into distance and direction
+
+        :param latitude: first location latitude in degrees
+        :param longitude: first location longitude in degrees
+        :param lat: second location latitude in degrees
+        :param lon: second location longitude in degrees
+        :return: (distance, direction)
+        """
+        dx = radians(lat - latitude) * EARTH_RADIUS
+        dy = radians(lon - longitude) * EARTH_RADIUS
+        r = sqrt(dx ** 2 + dy ** 2)
+        a = degrees(acos(_cap(dx / r))) if r else 0.0
+        a = a if 0. < dy else 360.0 - a
+        a = a if 0 <= a else 360 + a
+        return r, a
+
+    @staticmethod
+    def xy_array(latitude, longitude, distance, direction):
+        """ vectorized version of |Planar().xy()| """
+        phi = np.radians(direction)
+        w = latitude + np.degrees(distance * np.cos(phi) / EARTH_RADIUS)
+        z = longitude + np.degrees(distance * np.sin(phi) / EARTH_RADIUS)
+        return w, z
+
+    @staticmethod
+    def polar_array(latitude, longitude, lat, lon):
+        """ vectorized version of |Planar().polar()| """
+        dx = np.radians(np.subtract(lat, latitude)) * EARTH_RADIUS
+        dy = np.radians(np.subtract(lon, longitude)) * EARTH_RADIUS
+        r = np.hypot(dx, dy)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = np.degrees(np.arccos(np.clip(dx / r, -1.0, 1.0)))
+        a = np.where(r > 0., a, 0.0)
+        a = np.where(0. < dy, a, 360.0 - a)
+        a = np.where(0. <= a, a, 360.0 + a)
+        return r, a
+
+
+class Equirectangular(object):
+    """ planar geometry with degrees of longitude
+        shortened by the cosine of the mean latitude """
+
+    @staticmethod
+    def xy(latitude, longitude, distance, direction):
+        """ see |Planar().xy()| """
+        phi = radians(direction)
+        w = latitude + degrees(distance * cos(phi) / EARTH_RADIUS)
+        c = cos(radians(latitude + w) * 0.5)
+        z = longitude + degrees(distance * sin(phi) / EARTH_RADIUS / c)
+        return w, z
+
+    @staticmethod
+    def polar(latitude, longitude, lat, lon):
+        """ see |Planar().polar()| """
+        c = cos(radians(latitude + lat) * 0.5)
+        dx = radians(lat - latitude) * EARTH_RADIUS
+        dy = radians(lon - longitude) * EARTH_RADIUS * c
+        return sqrt(dx * dx + dy * dy), degrees(atan2(dy, dx)) % 360.0
+
+    @staticmethod
+    def xy_array(latitude, longitude, distance, direction):
+        """ vectorized version of |Equirectangular().xy()| """
+        phi = np.radians(direction)
+        w = latitude + np.degrees(distance * np.cos(phi) / EARTH_RADIUS)
+        c = np.cos(np.radians(np.add(latitude, w)) * 0.5)
+        z = longitude + np.degrees(distance * np.sin(phi) / EARTH_RADIUS / c)
+        return w, z
+
+    @staticmethod
+    def polar_array(latitude, longitude, lat, lon):
+        """ vectorized version of |Equirectangular().polar()| """
+        c = np.cos(np.radians(np.add(latitude, lat)) * 0.5)
+        dx = np.radians(np.subtract(lat, latitude)) * EARTH_RADIUS
+        dy = np.radians(np.subtract(lon, longitude)) * EARTH_RADIUS * c
+        return np.hypot(dx, dy), np.degrees(np.arctan2(dy, dx)) % 360.0
+
+
+class Haversine(object):
+    """ great circle geometry on the sphere of radius **EARTH_RADIUS** """
+
+    @staticmethod
+    def xy(latitude, longitude, distance, direction):
+        """ see |Planar().xy()| """
+        phi, lam = radians(latitude), radians(longitude)
+        theta, delta = radians(direction), distance / EARTH_RADIUS
+        sin_w = sin(phi) * cos(delta) + cos(phi) * sin(delta) * cos(theta)
+        w = asin(_cap(sin_w))
+        z = lam + atan2(sin(theta) * sin(delta) * cos(phi),
+                        cos(delta) - sin(phi) * sin_w)
+        return degrees(w), degrees(z)
+
+    @staticmethod
+    def polar(latitude, longitude, lat, lon):
+        """ see |Planar().polar()| """
+        phi_1, phi_2 = radians(latitude), radians(lat)
+        d_lam = radians(lon - longitude)
+        h = sin((phi_2 - phi_1) * 0.5) ** 2 + \
+            cos(phi_1) * cos(phi_2) * sin(d_lam * 0.5) ** 2
+        r = 2. * EARTH_RADIUS * asin(sqrt(_cap(h)))
+        a = atan2(sin(d_lam) * cos(phi_2),
+                  cos(phi_1) * sin(phi_2) -
+                  sin(phi_1) * cos(phi_2) * cos(d_lam))
+        return r, degrees(a) % 360.0
+
+    @staticmethod
+    def xy_array(latitude, longitude, distance, direction):
+        """ vectorized version of |Haversine().xy()| """
+        phi, lam = np.radians(latitude), np.radians(longitude)
+        theta = np.radians(direction)
+        delta = np.divide(distance, EARTH_RADIUS)
+        sin_w = np.sin(phi) * np.cos(delta) + \
+            np.cos(phi) * np.sin(delta) * np.cos(theta)
+        w = np.arcsin(np.clip(sin_w, -1.0, 1.0))
+        z = lam + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi),
+                             np.cos(delta) - np.sin(phi) * sin_w)
+        return np.degrees(w), np.degrees(z)
+
+    @staticmethod
+    def polar_array(latitude, longitude, lat, lon):
+        """ vectorized version of |Haversine().polar()| """
+        phi_1, phi_2 = np.radians(latitude), np.radians(lat)
+        d_lam = np.radians(np.subtract(lon, longitude))
+        h = np.sin((phi_2 - phi_1) * 0.5) ** 2 + \
+            np.cos(phi_1) * np.cos(phi_2) * np.sin(d_lam * 0.5) ** 2
+        r = 2. * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+        a = np.arctan2(np.sin(d_lam) * np.cos(phi_2),
+                       np.cos(phi_1) * np.sin(phi_2) -
+                       np.sin(phi_1) * np.cos(phi_2) * np.cos(d_lam))
+        return r, np.degrees(a) % 360.0
+
+
+class Tangent(object):
+    """ local east-north-up (ENU) tangent plane geometry
+        at the first location (orthographic projection of the sphere) """
+
+    @staticmethod
+    def xy(latitude, longitude, distance, direction):
+        """ see |Planar().xy()| """
+        phi, lam = radians(latitude), radians(longitude)
+        theta = radians(direction)
+        e = distance * sin(theta) / EARTH_RADIUS
+        n = distance * cos(theta) / EARTH_RADIUS
+        u = sqrt(max(0.0, 1.0 - e * e - n * n))
+        sp, cp, sl, cl = sin(phi), cos(phi), sin(lam), cos(lam)
+        x = -sl * e - sp * cl * n + cp * cl * u
+        y = cl * e - sp * sl * n + cp * sl * u
+        z = cp * n + sp * u
+        return degrees(asin(_cap(z))), degrees(atan2(y, x))
+
+    @staticmethod
+    def polar(latitude, longitude, lat, lon):
+        """ see |Planar().polar()| """
+        phi_1, phi_2 = radians(latitude), radians(lat)
+        d_lam = radians(lon - longitude)
+        e = cos(phi_2) * sin(d_lam)
+        n = cos(phi_1) * sin(phi_2) - sin(phi_1) * cos(phi_2) * cos(d_lam)
+        r = EARTH_RADIUS * sqrt(e * e + n * n)
+        return r, degrees(atan2(e, n)) % 360.0
+
+    @staticmethod
+    def xy_array(latitude, longitude, distance, direction):
+        """ vectorized version of |Tangent().xy()| """
+        phi, lam = np.radians(latitude), np.radians(longitude)
+        theta = np.radians(direction)
+        e = distance * np.sin(theta) / EARTH_RADIUS
+        n = distance * np.cos(theta) / EARTH_RADIUS
+        u = np.sqrt(np.maximum(0.0, 1.0 - e * e - n * n))
+        sp, cp, sl, cl = np.sin(phi), np.cos(phi), np.sin(lam), np.cos(lam)
+        x = -sl * e - sp * cl * n + cp * cl * u
+        y = cl * e - sp * sl * n + cp * sl * u
+        z = cp * n + sp * u
+        return np.degrees(np.arcsin(np.clip(z, -1.0, 1.0))), \
+            np.degrees(np.arctan2(y, x))
+
+    @staticmethod
+    def polar_array(latitude, longitude, lat, lon):
+        """ vectorized version of |Tangent().polar()| """
+        phi_1, phi_2 = np.radians(latitude), np.radians(lat)
+        d_lam = np.radians(np.subtract(lon, longitude))
+        e = np.cos(phi_2) * np.sin(d_lam)
+        n = np.cos(phi_1) * np.sin(phi_2) - \
+            np.sin(phi_1) * np.cos(phi_2) * np.cos(d_lam)
+        r = EARTH_RADIUS * np.hypot(e, n)
+        return r, np.degrees(np.arctan2(e, n)) % 360.0
+
+
+GEOMETRIES = {
+    'planar': Planar,
+    'equirectangular': Equirectangular,
+    'haversine': Haversine,
+    'tangent': Tangent,
+}
+
+
+def get_geometry(geometry):
+    """ geometry engine by name
+
+    :param geometry: name of the geometry as in **GEOMETRIES**,
+        i.e. one of
+
+            * `planar` (|Planar|)
+            * `equirectangular` (|Equirectangular|)
+            * `haversine` (|Haversine|)
+            * `tangent` (|Tangent|)
+
+        or a geometry class itself.
+        Further geometries can be registered by adding them
+        to **GEOMETRIES**.
+        A geometry class provides the staticmethods
+        **xy**, **polar**, **xy_array** and **polar_array**.
+
+    :return: geometry class
+    """
+    if isinstance(geometry, str):
+        if geometry not in GEOMETRIES:
+            raise ValueError('Geometry must be of %s' % str(GEOMETRIES))
+        return GEOMETRIES[geometry]
+    return geometry
+
+
+class LocalFrame(object):
+
+    def __init__(self, origin):
+        """ metric tangent plane anchored at an origin location
+
+        :param origin: |Location| (or pair of latitude and longitude)
+            at which the plane touches the earth
+
+        The frame maps latitude and longitude to planar
+        **x** (meters east) and **y** (meters north) coordinates
+        relative to **origin** by an equirectangular projection,
+        i.e. degrees of longitude are shortened by the cosine of the
+        latitude of **origin**.
+        Compared to great circle distances (see |Haversine|)
+        the error grows with the square of the distance to **origin**,
+        i.e. it stays below a millimeter within 100 meters
+        but reaches about 4 centimeters at 1 kilometer,
+        30 centimeters at 3 kilometers and 90 centimeters
+        at 5 kilometers (in central Europe).
+
+        The conversion factors are computed once on instantiation
+        and the planar segments of each |Way| are cached
+        as long as the way exists, so repeated projections
+        onto ways within the frame run on plain planar coordinates.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, LocalFrame
+            >>> h_da = Location(latitude=49.86722, longitude=8.638495)
+            >>> tu_da = Location(latitude=49.87515, longitude=8.658122)
+            >>> frame = LocalFrame(h_da)
+            >>> x, y = frame.xy(tu_da)
+            >>> round(x, 3), round(y, 3)
+            (1408.281, 882.764)
+            >>> round(frame.dist(h_da, tu_da), 3)
+            1662.085
+            >>> frame.to_latlon(x, y) == tu_da.coordinate
+            True
+
+        """
+        if isinstance(origin, (tuple, list)):
+            latitude, longitude = origin
+        else:
+            latitude, longitude = origin.latitude, origin.longitude
+        self._origin = origin
+        self._latitude = latitude
+        self._longitude = longitude
+        self._ky = METER_PER_DEGREE
+        self._kx = METER_PER_DEGREE * cos(radians(latitude))
+        self._segments = WeakKeyDictionary()
+
+    @property
+    def origin(self):
+        """ origin of the frame """
+        return self._origin
+
+    def to_xy(self, latitude, longitude):
+        """ planar coordinates of latitudes and longitudes
+
+        :param latitude: latitude (or :class:`numpy.ndarray` of)
+        :param longitude: longitude (or :class:`numpy.ndarray` of)
+        :return: (x, y) in meters east and north of the origin
+        """
+        x = (longitude - self._longitude) * self._kx
+        y = (latitude - self._latitude) * self._ky
+        return x, y
+
+    def to_latlon(self, x, y):
+        """ latitudes and longitudes of planar coordinates
+
+        :param x: meters east of the origin
+            (or :class:`numpy.ndarray` of)
+        :param y: meters north of the origin
+            (or :class:`numpy.ndarray` of)
+        :return: (latitude, longitude)
+        """
+        return self._latitude + y / self._ky, self._longitude + x / self._kx
+
+    def xy(self, location):
+        """ planar coordinates of a location
+
+        :param location: |Location| or |LocationArray|
+        :return: (x, y) in meters east and north of the origin
+        """
+        return self.to_xy(location.latitude, location.longitude)
+
+    def dist(self, a, b):
+        """ planar distance between two locations
+
+        :param a: |Location| or |LocationArray|
+        :param b: |Location| or |LocationArray|
+        :return: distance in meters
+        """
+        (ax, ay), (bx, by) = self.xy(a), self.xy(b)
+        if np.ndim(ax) or np.ndim(bx):
+            return np.hypot(bx - ax, by - ay)
+        return sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+
+    def dir(self, a, b):
+        """ planar direction from one location to another
+
+        :param a: |Location| or |LocationArray|
+        :param b: |Location| or |LocationArray|
+        :return: direction in degrees north
+        """
+        (ax, ay), (bx, by) = self.xy(a), self.xy(b)
+        if np.ndim(ax) or np.ndim(bx):
+            return np.degrees(np.arctan2(bx - ax, by - ay)) % 360.0
+        return degrees(atan2(bx - ax, by - ay)) % 360.0
+
+    def segments(self, way):
+        """ planar coordinates of the segments of a way
+
+        :param way: |Way|
+        :return: tuple (x0, y0, x1, y1) of :class:`numpy.ndarray`
+            with start and end coordinates of each segment
+
+        The result is cached as long as the way exists.
+        """
+        segments = self._segments.get(way)
+        if segments is None:
+            latitude, longitude = way.coordinates.T
+            x, y = self.to_xy(latitude, longitude)
+            segments = x[:-1], y[:-1], x[1:], y[1:]
+            self._segments[way] = segments
+        return segments
+
+    def project(self, location, a, b=None, segment=False):
+        """ projects location onto line given by two locations
+
+        :param location: |Location| to project
+        :param a: first |Location| defining the line to project to
+        :param b: second |Location| defining the line to project to,
+            (optional, default **a.next()**).
+        :param segment: bool if projected |Location| is forced
+            to fall into segment between **a** and **b**
+            (optional, default False)
+        :return: |Location| as in |Location().project()|
+            but calculated in the planar coordinates of the frame
+        """
+        b = a.next() if b is None else b
+        if a == b:
+            return a
+        (ax, ay), (bx, by) = self.xy(a), self.xy(b)
+        lx, ly = self.xy(location)
+        bx, by = bx - ax, by - ay
+        t = ((lx - ax) * bx + (ly - ay) * by) / (bx * bx + by * by)
+        if segment:
+            t = max(0.0, min(t, 1.0))
+        d = degrees(atan2(bx, by)) % 360.0
+        s = location.speed * cos(radians(location.direction - d))
+        lat, lon = self.to_latlon(ax + t * bx, ay + t * by)
+        return location.clone(latitude=lat, longitude=lon,
+                              direction=d, speed=s)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+import numpy as np
+
+__all__ = 'WayGraph',
+
+
+def _csr(keys, values, size):
+    # compressed sparse rows of values grouped by keys in range(size)
+    order = np.argsort(keys, kind='stable')
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=ptr[1:])
+    return ptr, values[order]
+
+
+class WayGraph(object):
+
+    def __init__(self, ways=()):
+        """ road network of ways connected by their nodes
+
+        :param ways: sequence of |Way|
+
+        The graph is built at once from |Way().nodes|
+        and stored in compressed integer arrays
+
+            * node id to the ways containing this node
+            * way to its successors, i.e. the ways which can be entered
+              at a node where the way can be left
+
+        A way can be entered at any of its nodes
+        unless it is |Way().oneway| and the node is its last one.
+        Likewise, a way can be left at any of its nodes
+        unless it is |Way().oneway| and the node is its first one.
+
+        .. code-block:: python
+
+            >>> from colimit import Way
+            >>> from colimit.graph import WayGraph
+            >>> a = Way(id=1, nodes=(1, 2, 3))
+            >>> b = Way(id=2, nodes=(3, 4), oneway=True)
+            >>> c = Way(id=3, nodes=(5, 4), oneway=True)
+            >>> d = Way(id=4, nodes=(4, 6), oneway=True)
+            >>> graph = WayGraph((a, b, c, d))
+            >>> graph.successors(a)
+            (Way(2),)
+            >>> graph.successors(b)
+            (Way(4),)
+            >>> graph.successors(c)
+            (Way(4),)
+            >>> graph.ways_at(4)
+            (Way(2), Way(3), Way(4))
+
+        """
+        self._ways = tuple(ways)
+        self._index = dict((w.id, i) for i, w in enumerate(self._ways))
+        n = len(self._ways)
+
+        lengths = np.fromiter((len(w.nodes) for w in self._ways),
+                              dtype=np.int64, count=n)
+        nodes = np.fromiter((i for w in self._ways for i in w.nodes),
+                            dtype=np.int64, count=int(lengths.sum()))
+        way = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        last = np.zeros(len(nodes), dtype=bool)
+        last[np.cumsum(lengths)[0 < lengths] - 1] = True
+        first = np.zeros(len(nodes), dtype=bool)
+        first[(np.cumsum(lengths) - lengths)[0 < lengths]] = True
+        oneway = np.fromiter((bool(w.oneway) for w in self._ways),
+                             dtype=bool, count=n)
+
+        # node id -> ways
+        self._node_ids, inverse = np.unique(nodes, return_inverse=True)
+        self._node_ptr, order = \
+            _csr(inverse, np.arange(len(nodes)), len(self._node_ids))
+        self._node_ways = way[order]
+
+        # way -> successor ways by pairs of entries at the same node
+        size = np.diff(self._node_ptr)
+        group = np.repeat(np.arange(len(size)), size)
+        count = size[group]
+        left = np.repeat(np.arange(len(order)), count)
+        offset = np.repeat(np.cumsum(count) - count, count)
+        right = self._node_ptr[group[left]] + np.arange(len(left)) - offset
+        i, j = way[order[left]], way[order[right]]
+        allowed = (i != j) & ~(oneway[i] & first[order[left]]) \
+            & ~(oneway[j] & last[order[right]])
+        pairs = np.unique(i[allowed] * n + j[allowed])
+        self._succ_ptr, self._succ_ways = \
+            _csr(pairs // max(n, 1), pairs % max(n, 1), n)
+
+    @property
+    def ways(self):
+        """ ways of the graph """
+        return self._ways
+
+    def index(self, way):
+        """ position of a way in |WayGraph().ways|
+
+        :param way: |Way| or way id
+        :return: :class:`int`
+        """
+        key = way if isinstance(way, (int, np.integer)) else way.id
+        if key not in self._index:
+            raise KeyError('%r not in graph' % way)
+        return self._index[key]
+
+    def ways_at(self, node):
+        """ ways containing a node
+
+        :param node: node id
+        :return: :class:`tuple` (|Way|)
+        """
+        i = np.searchsorted(self._node_ids, node)
+        if i == len(self._node_ids) or not self._node_ids[i] == node:
+            return ()
+        ways = self._node_ways[self._node_ptr[i]:self._node_ptr[i + 1]]
+        return tuple(self._ways[w] for w in dict.fromkeys(ways.tolist()))
+
+    def successors(self, way):
+        """ ways which can be entered from a way
+
+        :param way: |Way| or way id
+        :return: :class:`tuple` (|Way|)
+        """
+        i = self.index(way)
+        ways = self._succ_ways[self._succ_ptr[i]:self._succ_ptr[i + 1]]
+        return tuple(self._ways[w] for w in ways.tolist())
+
+    def bfs(self, way, depth=1):
+        """ ways reachable from a way in breadth first order
+
+        :param way: |Way| or way id to start from
+        :param depth: maximal number of ways to pass (optional, default 1)
+        :return: :class:`tuple` of levels,
+            each a :class:`tuple` (|Way|) of ways first reached
+            by passing as many ways as the level number
+            (the first level is the start **way** only)
+        """
+        visited = np.zeros(len(self._ways), dtype=bool)
+        frontier = np.array([self.index(way)])
+        visited[frontier] = True
+        levels = [frontier]
+        ptr, succ = self._succ_ptr, self._succ_ways
+        for _ in range(depth):
+            start, stop = ptr[frontier], ptr[frontier + 1]
+            if not (stop - start).sum():
+                break
+            nxt = np.concatenate([succ[a:b] for a, b in zip(start, stop)])
+            frontier = np.unique(nxt[~visited[nxt]])
+            if not len(frontier):
+                break
+            visited[frontier] = True
+            levels.append(frontier)
+        return tuple(tuple(self._ways[w] for w in level.tolist())
+                     for level in levels)
+
+    def beam(self, way, score, depth=3, width=5):
+        """ most likely paths starting at a way
+
+        :param way: |Way| or way id to start from
+        :param score: function to score a path,
+            i.e. a :class:`tuple` (|Way|), higher is more likely
+        :param depth: number of successive ways to add
+            (optional, default 3)
+        :param width: number of paths to keep at each step
+            (optional, default 5)
+        :return: :class:`tuple` of paths,
+            each a :class:`tuple` (|Way|) starting with **way**,
+            in descending order of **score**
+
+        Paths are extended way by way by their |WayGraph().successors()|
+        (without visiting a way twice) and only the **width**
+        best scored paths are kept.
+        Paths without successors are kept as they are.
+        """
+        paths = [(self._ways[self.index(way)],)]
+        for _ in range(depth):
+            candidates = list()
+            for path in paths:
+                succ = [w for w in self.successors(path[-1])
+                        if w not in path]
+                candidates.extend(path + (w,) for w in succ)
+                if not succ:
+                    candidates.append(path)
+            paths = sorted(candidates, key=score, reverse=True)[:width]
+        return tuple(paths)
+
+    def __contains__(self, item):
+        return getattr(item, 'id', item) in self._index
+
+    def __len__(self):
+        return len(self._ways)
+
+    def __repr__(self):
+        return "%s(%d)" % (self.__class__.__name__, len(self._ways))
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+from abc import ABC, abstractmethod
+from math import cos, radians, hypot
+
+import numpy as np
+
+from .geometry import METER_PER_DEGREE, LocalFrame
+
+__all__ = 'WayIndex', 'SegmentIndex'
+
+CELL = 250.  # default grid cell size in meters
+
+
+def _ranges(starts, lengths):
+    # concatenation of range(s, s + n) for s, n in zip(starts, lengths)
+    total = int(lengths.sum())
+    shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return shift + np.arange(total, dtype=np.int64)
+
+
+class _Grid(object):
+    """ uniform grid of cells in degrees referencing boxes by index """
+
+    def __init__(self, bounds, cell=CELL):
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self._bounds = bounds
+        south, west, north, east = bounds.T
+        latitude = (south.min() + north.max()) * 0.5 if len(bounds) else 0.
+        self._dlat = cell / METER_PER_DEGREE
+        self._dlon = self._dlat / max(cos(radians(latitude)), 1e-6)
+        self._south = south.min() if len(bounds) else 0.
+        self._west = west.min() if len(bounds) else 0.
+        self._rows, self._cols = self._cell(north.max(), east.max()) \
+            if len(bounds) else (0, 0)
+        self._rows += 1
+        self._cols += 1
+
+        # register each box in every cell it covers
+        i0, j0 = self._cell(south, west)
+        i1, j1 = self._cell(north, east)
+        height, width = i1 - i0 + 1, j1 - j0 + 1
+        count = height * width
+        entry = np.repeat(np.arange(len(bounds)), count)
+        k = _ranges(np.zeros(len(bounds), dtype=np.int64), count)
+        key = (i0[entry] + k // width[entry]) * self._cols + \
+            j0[entry] + k % width[entry]
+        order = np.argsort(key, kind='stable')
+        self._keys, first = np.unique(key[order], return_index=True)
+        self._ptr = np.append(first, len(key)).astype(np.int64)
+        self._entries = entry[order]
+
+    def _cell(self, latitude, longitude):
+        i = np.floor((np.subtract(latitude, self._south)) / self._dlat)
+        j = np.floor((np.subtract(longitude, self._west)) / self._dlon)
+        return i.astype(np.int64), j.astype(np.int64)
+
+    @property
+    def cells(self):
+        """ number of occupied cells """
+        return len(self._keys)
+
+    def query(self, south, west, north, east):
+        """ indices of boxes intersecting the given bounds """
+        if not len(self._keys):
+            return np.zeros(0, dtype=np.int64)
+        i0, j0 = self._cell(south, west)
+        i1, j1 = self._cell(north, east)
+        i0, j0 = max(int(i0), 0), max(int(j0), 0)
+        i1, j1 = min(int(i1), self._rows - 1), min(int(j1), self._cols - 1)
+        if i1 < i0 or j1 < j0:
+            return np.zeros(0, dtype=np.int64)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) < len(self._keys):
+            rows = np.arange(i0, i1 + 1)[:, None] * self._cols
+            keys = (rows + np.arange(j0, j1 + 1)).ravel()
+            pos = np.searchsorted(self._keys, keys)
+            pos = pos[pos < len(self._keys)]
+            pos = pos[np.isin(self._keys[pos], keys)]
+        else:
+            # query covers more cells than occupied, so scan occupied ones
+            i, j = np.divmod(self._keys, self._cols)
+            pos = np.flatnonzero((i0 <= i) & (i <= i1) & (j0 <= j) & (j <= j1))
+        entries = np.unique(self._entries[
+            _ranges(self._ptr[pos], self._ptr[pos + 1] - self._ptr[pos])])
+        s, w, n, e = self._bounds[entries].T
+        inside = (s <= north) & (south <= n) & (w <= east) & (west <= e)
+        return entries[inside]
+
+
+class _Index(ABC):
+    """ ways and their coordinates in one array """
+
+    def __init__(self, ways=(), cell=CELL):
+        self._ways = tuple(w for w in ways if len(w))
+        self._cell = cell
+        n = len(self._ways)
+        lengths = np.fromiter((len(w) for w in self._ways), np.int64, n)
+        self._offsets = np.cumsum(lengths) - lengths
+        self._lengths = lengths
+        self._coordinates = np.concatenate(
+            [w.coordinates for w in self._ways] or [np.zeros((0, 2))])
+        self._extent = self._coordinates.min(axis=0).tolist() + \
+            self._coordinates.max(axis=0).tolist() if n else None
+        self._grid = None
+
+    @property
+    def ways(self):
+        """ indexed ways """
+        return self._ways
+
+    def _segments(self, entries):
+        # way, position, start and end coordinates of all segments
+        # of ways by entries (single node ways as zero length segment)
+        nodes = _ranges(self._offsets[entries], self._lengths[entries])
+        way = np.repeat(entries, self._lengths[entries])
+        position = nodes - np.repeat(self._offsets[entries],
+                                     self._lengths[entries])
+        last = position == np.repeat(self._lengths[entries] - 1,
+                                     self._lengths[entries])
+        keep = ~last | (position == 0)
+        start = nodes[keep]
+        end = np.where(last[keep], start, start + 1)
+        return way[keep], position[keep], \
+            self._coordinates[start], self._coordinates[end]
+
+    def _distances(self, frame, entries):
+        # distance of frame origin to segments of entries
+        way, segment, start, end = self._entry_segments(entries)
+        x0, y0 = frame.to_xy(start[:, 0], start[:, 1])
+        x1, y1 = frame.to_xy(end[:, 0], end[:, 1])
+        dx, dy = x1 - x0, y1 - y0
+        dd = dx * dx + dy * dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = -(x0 * dx + y0 * dy) / dd
+        t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+        return way, segment, np.hypot(x0 + t * dx, y0 + t * dy)
+
+    def _candidates(self, frame, radius):
+        south, west = frame.to_latlon(-radius, -radius)
+        north, east = frame.to_latlon(radius, radius)
+        return self._grid.query(south, west, north, east)
+
+    @abstractmethod
+    def _entry_segments(self, entries):
+        """ way, segment position, start and end coordinates
+            of the segments of grid entries """
+
+    def nearest(self, location, k=1):
+        """ nearest segments to a location
+
+        :param location: |Location|
+        :param k: number of segments (optional, default 1)
+        :return: :class:`tuple` of at most **k** tuples
+            (|Way|, **segment**, **distance**)
+            of a way, the index of the segment in |Way().segments|
+            and the distance in meters to the segment
+            in ascending order of **distance**
+
+        The search radius starts with one grid cell
+        and doubles until **k** segments are found within.
+        """
+        frame = LocalFrame(location)
+        if not self._ways:
+            return ()
+        south, west, north, east = self._extent
+        x0, y0 = frame.to_xy(south, west)
+        x1, y1 = frame.to_xy(north, east)
+        limit = max(hypot(x0, y0), hypot(x0, y1),
+                    hypot(x1, y0), hypot(x1, y1))
+        radius = self._cell
+        while True:
+            entries = self._candidates(frame, radius)
+            way, segment, dist = self._distances(frame, entries)
+            if k <= np.count_nonzero(dist <= radius) or limit < radius:
+                break
+            radius *= 2.
+        order = np.argsort(dist, kind='stable')[:k]
+        if radius <= limit:
+            order = order[dist[order] <= radius]
+        return tuple((self._ways[i], j, d) for i, j, d in
+                     zip(way[order].tolist(), segment[order].tolist(),
+                         dist[order].tolist()))
+
+    def __len__(self):
+        return len(self._ways)
+
+    def __repr__(self):
+        return "%s(%d)" % (self.__class__.__name__, len(self._ways))
+
+
+class WayIndex(_Index):
+
+    def __init__(self, ways=(), cell=CELL):
+        """ spatial index over many ways
+
+        :param ways: sequence of |Way|
+        :param cell: grid cell size in meters (optional, default 250)
+
+        The bounding boxes of all **ways** are registered
+        in the cells of a uniform grid.
+        So queries only check the ways registered in the cells they touch
+        rather than scanning all ways.
+
+        The coordinates of all ways are kept in one array,
+        so distances to the segments of candidate ways
+        are calculated at once (in a |LocalFrame| at the query location).
+
+        Ways without geometry are ignored.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> from colimit.index import WayIndex
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> c = Location(latitude=49.8680, longitude=8.6400)
+            >>> index = WayIndex((Way(id=1, geometry=(a, b)),
+            ...                   Way(id=2, geometry=(b, c))))
+            >>> loc = Location(latitude=49.8675, longitude=8.6385)
+            >>> index.radius(loc, 50.)
+            (Way(1),)
+            >>> (way, segment, distance), = index.nearest(loc)
+            >>> way, segment, round(distance, 3)
+            (Way(1), 0, 35.876)
+
+        """
+        super().__init__(ways, cell)
+        bounds = np.array([w.bounds for w in self._ways]).reshape(-1, 4)
+        self._grid = _Grid(bounds, cell)
+
+    def bbox(self, south, west, north, east):
+        """ ways with bounding box intersecting given bounds
+
+        :param south: in degrees
+        :param west: in degrees
+        :param north: in degrees
+        :param east: in degrees
+        :return: :class:`tuple` (|Way|)
+        """
+        entries = self._grid.query(south, west, north, east)
+        return tuple(self._ways[i] for i in entries.tolist())
+
+    def _entry_segments(self, entries):
+        return self._segments(entries)
+
+    def radius(self, location, radius):
+        """ ways within a radius around a location
+
+        :param location: |Location|
+        :param radius: in meters
+        :return: :class:`tuple` (|Way|) in ascending order of distance
+            to their nearest segment
+        """
+        frame = LocalFrame(location)
+        entries = self._candidates(frame, radius)
+        if not len(entries):
+            return ()
+        way, _, dist = self._distances(frame, entries)
+        first = np.flatnonzero(np.diff(way, prepend=-1))
+        dist = np.minimum.reduceat(dist, first)
+        order = np.argsort(dist, kind='stable')
+        order = order[dist[order] <= radius]
+        return tuple(self._ways[i] for i in way[first][order].tolist())
+
+
+class SegmentIndex(_Index):
+
+    def __init__(self, ways=(), cell=CELL):
+        """ spatial index over the segments of many ways
+
+        :param ways: sequence of |Way|
+        :param cell: grid cell size in meters (optional, default 250)
+
+        Works as |WayIndex| but registers the bounding box
+        of each segment of |Way().segments| rather than of the whole way.
+        So long ways, e.g. motorways, are only candidates
+        in cells close to their segments.
+
+        Entries are referenced by the position of their way
+        in |SegmentIndex().ways| and the index of the segment,
+        i.e. the |Way| objects are shared and not copied.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> from colimit.index import SegmentIndex
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> c = Location(latitude=49.8680, longitude=8.6400)
+            >>> index = SegmentIndex((Way(id=1, geometry=(a, b, c)),))
+            >>> loc = Location(latitude=49.8685, longitude=8.6390)
+            >>> (way, segment, distance), = index.radius(loc, 60.)
+            >>> way, segment, round(distance, 3)
+            (Way(1), 1, 55.66)
+
+        """
+        super().__init__(ways, cell)
+        entries = np.arange(len(self._ways))
+        self._way, self._segment, self._start, self._end = \
+            self._segments(entries)
+        bounds = np.hstack((np.minimum(self._start, self._end),
+                            np.maximum(self._start, self._end)))
+        self._grid = _Grid(bounds, cell)
+
+    def bbox(self, south, west, north, east):
+        """ segments with bounding box intersecting given bounds
+
+        :param south: in degrees
+        :param west: in degrees
+        :param north: in degrees
+        :param east: in degrees
+        :return: :class:`tuple` of tuples (|Way|, **segment**)
+            of a way and the index of the segment in |Way().segments|
+        """
+        entries = self._grid.query(south, west, north, east)
+        return tuple((self._ways[i], j) for i, j in
+                     zip(self._way[entries].tolist(),
+                         self._segment[entries].tolist()))
+
+    def _entry_segments(self, entries):
+        return self._way[entries], self._segment[entries], \
+            self._start[entries], self._end[entries]
+
+    def radius(self, location, radius):
+        """ segments within a radius around a location
+
+        :param location: |Location|
+        :param radius: in meters
+        :return: :class:`tuple` of tuples (|Way|, **segment**, **distance**)
+            as given by |SegmentIndex().nearest()|
+        """
+        frame = LocalFrame(location)
+        entries = self._candidates(frame, radius)
+        way, segment, dist = self._distances(frame, entries)
+        order = np.argsort(dist, kind='stable')
+        order = order[dist[order] <= radius]
+        return tuple((self._ways[i], j, d) for i, j, d in
+                     zip(way[order].tolist(), segment[order].tolist(),
+                         dist[order].tolist()))
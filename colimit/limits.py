@@ -10,37 +10,56 @@
 # License:  No License - only for h_da staff or students (see LICENSE file)
 
 
+import asyncio
 import json
 import gzip
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from threading import Lock, get_ident, local
+from weakref import WeakKeyDictionary, WeakSet
 
 import requests
+from requests.adapters import HTTPAdapter
 
+import numpy as np
+
+from .cache import WayCache
+from .table import WayTable
+from .tiles import around, intersects, tile_bounds, tiles
 from .way import Way
 
-__all__ = "Connection",
+__all__ = "Connection", "AsyncConnection"
 
 URL = "https://limits.pythonanywhere.com"
 PORT = "443"
 TIMEOUT = 180
+POOL_SIZE = 10
+CHUNK_SIZE = 100
 
 
 class LimitsServerError(Exception):
     """Error on limits server"""
-    def __init__(self, e):
+    def __init__(self, e, status=None, reason=None):
         if isinstance(e, str) and e.startswith('<!DOCTYPE HTML'):
             try:
                 from bs4 import BeautifulSoup
                 e = BeautifulSoup(e).get_text('\n')
             except:
                 pass
+        if status is not None:
+            e = '%s %s: %s' % (status, reason or '', e)
         super().__init__(e)
+        self.status = status
 
 
 class Connection(object):
 
     def __init__(self, username=None, password=None,
-                 url=URL, port=None, timeout=None):
+                 url=URL, port=None, timeout=None, registry=None,
+                 pool_size=POOL_SIZE, pool_connections=POOL_SIZE,
+                 pool_block=False, keep_alive=True, cache=None):
         """ |Connection| to a `limits` development server
 
         :param username: the username
@@ -48,6 +67,18 @@ class Connection(object):
         :param url: url to the `limits` server
         :param port: port to connect to server
         :param timeout: timeout for requests
+        :param registry: |WayRegistry| to share |Way| objects
+            of consecutive results (optional)
+        :param pool_size: number of connections kept open per host
+            (optional, default 10)
+        :param pool_connections: number of hosts to keep pools for
+            (optional, default 10)
+        :param pool_block: if **True** no more than **pool_size**
+            connections per host are used at once (optional, default **False**)
+        :param keep_alive: if **False** connections are closed
+            after each request (optional, default **True**)
+        :param cache: |WayCache| to keep results
+            of |Connection().get_ways()| in memory (optional)
 
         the `limits` development server stores
         and uses the `get_limit` functions on user requests.
@@ -73,6 +104,12 @@ class Connection(object):
         To invoke our `get_limit` code online programmatically use
         |Connection().get_limit()|.
 
+        All requests run on a pool of kept alive connections
+        which is shared by all threads using the |Connection|
+        (see |Connection().session|).
+        Use |Connection().close()| or a `with` statement
+        to close the connections.
+
         """
 
         self._usr = username
@@ -80,9 +117,58 @@ class Connection(object):
         self._url = url or URL
         self._port = port or PORT
         self._tmt = timeout
+        self._registry = registry
+        self._cache = cache
+        self._keep_alive = keep_alive
+        self._adapter = HTTPAdapter(pool_connections=pool_connections,
+                                    pool_maxsize=pool_size,
+                                    pool_block=pool_block)
+        self._local = local()
+        # sessions are owned by their threads and dropped with them
+        self._sessions = WeakSet()
+        self._lock = Lock()
         print('connect as "%s" to %s:%s' % (username, url, port))
         self._key = True
 
+    @property
+    def session(self):
+        """ :class:`requests.Session` of the current thread
+
+        Each thread gets its own session but all sessions
+        share the same pool of connections.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            if not self._keep_alive:
+                session.headers['Connection'] = 'close'
+            with self._lock:
+                self._sessions.add(session)
+            self._local.session = session
+        return session
+
+    def close(self):
+        """ closes all sessions and pooled connections """
+        with self._lock:
+            sessions, self._sessions = list(self._sessions), WeakSet()
+            self._local = local()
+        for session in sessions:
+            session.close()
+        self._adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def cache(self):
+        """ |WayCache| of |Connection().get_ways()| results (or **None**) """
+        return self._cache
+
     @property
     def online(self):
         return self._ping()
@@ -140,33 +226,69 @@ class Connection(object):
             in descending order expected to be taken.
 
         """
-        if location:
-            latitude = latitude or location.latitude
-            longitude = longitude or location.longitude
-            speed = speed or location.speed
-            direction = direction or location.direction
-        kwargs = {
-            "latitude": float(latitude),
-            "longitude": float(longitude),
-            "speed": float(speed),
-            "direction": float(direction)
-        }
-        response = requests.post(
+        kwargs = self._limit_kwargs(
+            latitude, longitude, speed, direction, location)
+        response = self.session.post(
             url=self._build_url('get_limit'),
             auth=self._auth,
             json=kwargs,
             timeout=self._tmt)
         if not response.status_code == 200:
-            print(response.status_code, response.reason, response.text)
-            raise LimitsServerError(response.text)
-        result = response.json()
-        limit = result.get('limit', None)
-        ways = tuple(Way(**w) for w in result.get('ways', ()))
-        return limit, ways
+            raise LimitsServerError(
+                response.text, response.status_code, response.reason)
+        return self._limit(response.json())
+
+    def get_limits(self, locations, chunk_size=CHUNK_SIZE):
+        """ invoke `get_limit` code online for many locations
+
+        :param locations: iterable of |Location()|
+        :param chunk_size: number of locations sent in one request
+            (optional, default 100)
+        :return: iterator of results as given by
+            |Connection().get_limit()| in order of **locations**
+            (or the exception raised for a single location)
+
+        Locations are sent in chunks of **chunk_size**
+        to the `get_limits` endpoint, so a long track takes
+        only a few round-trips.
+        Results are yielded as soon as their chunk arrives.
+
+        If a chunk fails (e.g. by a timeout or an error on server side),
+        its locations are retried one by one by |Connection().get_limit()|.
+        So a single bad location fails on its own
+        and servers without `get_limits` endpoint work, too.
+        If the retry of a location fails as well,
+        the raised exception (e.g. a `LimitsServerError`)
+        is yielded as its result and iteration goes on
+        with the remaining locations.
+
+        .. code-block:: python
+
+            >>> from colimit import Connection, Location, Way
+            >>> from colimit.server import LimitsServer
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> ways = [Way(id=1, limit=13.9, geometry=(a, b)).json]
+            >>> track = [a, b, a.next(1000., 90.)]
+            >>> with LimitsServer(ways) as server:
+            ...     ci = Connection('me', url=server.url, port=server.port)
+            ...     results = list(ci.get_limits(track, chunk_size=2))
+            ... # doctest: +ELLIPSIS
+            connect as "me" to http://127.0.0.1:...
+            >>> [limit for limit, _ in results]
+            [13.9, 13.9, -1.0]
+
+        """
+        if not 0 < chunk_size:
+            raise ValueError('chunk_size must be positive')
+        locations = iter(locations)
+        chunks = iter(lambda: list(islice(locations, chunk_size)), [])
+        return (result for chunk in chunks
+                for result in self._get_limits(chunk))
 
     def get_ways(self, latitude=None, longitude=None, radius=None,
                  south=None, west=None, north=None, east=None, area=None,
-                 timeout=None, file_cache=''):
+                 timeout=None, file_cache='', table=False, zoom=None):
         """ call the `limits` database as inside the `get_limits` code
 
         :param latitude: in degrees
@@ -187,8 +309,26 @@ class Connection(object):
             the file exits and its contents will be returned.
             In this case no data will be downloaded from the server
             until the **file_cache** is removed.
-
-        :return: :class:`tuple` (|Way()|)
+        :param table: if **True** a |WayTable| is returned
+            rather than a tuple of |Way()| (optional, default **False**)
+        :param zoom: zoom level of slippy map tiles
+            to cache by (optional, default **None**)
+            If given, the requested boundary is covered by tiles
+            (see :mod:`colimit.tiles`) and ways are cached per tile.
+            Only tiles missing in |Connection().cache|
+            and **file_cache** are downloaded
+            (by a single request)
+            and the result is merged from the tiles
+            and filtered by the requested boundary.
+            So nearby requests share their cached data.
+            Ignored without **file_cache** or |Connection().cache|
+            or if **area** is given.
+            With |Connection().cache| tiles as well as
+            the merged result are kept in memory.
+            Requires either **south**, **west**, **north** and **east**
+            or **latitude** and **longitude**.
+
+        :return: :class:`tuple` (|Way()|) or |WayTable|
 
         If given
         **latitude**, **longitude** and **radius**
@@ -203,6 +343,10 @@ class Connection(object):
         If **area** is given, the resulting data might be filtered by the
         boundary **south**, **west**, **north** and **east** if given.
 
+        If the |Connection| has a |WayCache| as |Connection().cache|,
+        results are looked up there first, i.e. before
+        the **file_cache** and the server.
+
         """
         timeout = TIMEOUT if timeout is None else timeout
         kwargs = {
@@ -217,6 +361,43 @@ class Connection(object):
             "timeout": timeout,
         }
 
+        if (file_cache or self._cache is not None) \
+                and zoom is not None and not area:
+            if not all(v is not None for v in (south, west, north, east)):
+                if latitude is None or longitude is None:
+                    raise ValueError('zoom requires south, west, north '
+                                     'and east or latitude and longitude')
+                south, west, north, east = around(
+                    latitude, longitude, radius or 0.0)
+            bounds = south, west, north, east
+
+            def load():
+                ways = self._get_tiles(*bounds, zoom, timeout, file_cache)
+                return WayTable(ways) if table else ways
+        else:
+            zoom = None
+
+            def load():
+                return self._get_ways(kwargs, file_cache, table)
+
+        if self._cache is None:
+            return load()
+        key = WayCache.key(table=table, zoom=zoom, **kwargs)
+        ways = self._cache.get(key)
+        if ways is None:
+            ways = load()
+            self._cache.put(key, ways)
+        return ways
+
+    # --- private methods ---
+
+    def _get_ways(self, kwargs, file_cache='', table=False):
+        latitude, longitude, radius = \
+            kwargs['latitude'], kwargs['longitude'], kwargs['radius']
+        south, west, north, east = \
+            kwargs['south'], kwargs['west'], kwargs['north'], kwargs['east']
+        area = kwargs['area']
+
         if file_cache:
             parts = list()
             if area:
@@ -233,26 +414,139 @@ class Connection(object):
 
             if os.path.exists(file_path):
                 ways = json.load(gzip.open(file_path, "rt"))
-                return tuple(Way(**w) for w in ways)
+                return self._ways(ways, table)
+
+        ways = self._post_ways(kwargs)
+
+        if file_cache:
+            self._dump(ways, file_path)
+
+        return self._ways(ways, table)
 
-        response = requests.post(
+    @staticmethod
+    def _limit_kwargs(latitude=None, longitude=None,
+                      speed=None, direction=None, location=None):
+        if location:
+            latitude = latitude or location.latitude
+            longitude = longitude or location.longitude
+            speed = speed or location.speed
+            direction = direction or location.direction
+        return {
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "speed": float(speed),
+            "direction": float(direction)
+        }
+
+    def _limit(self, result):
+        limit = result.get('limit', None)
+        ways = self._ways(result.get('ways', ()))
+        return limit, ways
+
+    def _get_limits(self, chunk):
+        kwargs = {
+            "locations": [self._limit_kwargs(location=g) for g in chunk]
+        }
+        try:
+            response = self.session.post(
+                url=self._build_url('get_limits'),
+                auth=self._auth,
+                json=kwargs,
+                timeout=self._tmt)
+            results = response.json()['results'] \
+                if response.status_code == 200 else None
+        except (requests.exceptions.RequestException, ValueError, KeyError):
+            results = None
+        if results is None or not len(results) == len(chunk):
+            # retry failed chunk location by location
+            return [self._retry_limit(g) for g in chunk]
+        return [self._limit(result) for result in results]
+
+    def _retry_limit(self, location):
+        # a failing location gives its error as result
+        try:
+            return self.get_limit(location=location)
+        except (LimitsServerError, requests.exceptions.RequestException,
+                ValueError) as e:
+            return e
+
+    def _post_ways(self, kwargs):
+        response = self.session.post(
             url=self._build_url('get_ways'),
             auth=self._auth,
             json=kwargs,
             timeout=self._tmt)
         if not response.status_code == 200:
-            print(response.status_code, response.reason, response.text)
-            raise LimitsServerError(response.text)
-        result = response.json()
-        ways = tuple(result['ways'])
-
-        if file_cache:
-            json.dump(ways, gzip.open(file_path, 'wt'), indent=2)
-
-        ways = tuple(Way(**w) for w in result['ways'])
-        return ways
-
-    # --- private methods ---
+            raise LimitsServerError(
+                response.text, response.status_code, response.reason)
+        return list(response.json()['ways'])
+
+    @staticmethod
+    def _dump(ways, file_path):
+        # write to a temporary file first, so concurrent calls
+        # never read a partially written file
+        temp_path = '%s.%d.tmp' % (file_path, get_ident())
+        with gzip.open(temp_path, 'wt') as file:
+            json.dump(ways, file, indent=2)
+        os.replace(temp_path, file_path)
+
+    def _get_tiles(self, south, west, north, east, zoom, timeout, file_cache):
+        cached, missing = dict(), list()
+        for xy in tiles(south, west, north, east, zoom):
+            key = ('tile', zoom) + xy
+            ways = None if self._cache is None else self._cache.get(key)
+            if ways is not None:
+                cached[xy] = ways
+                continue
+            file_name = "tile_z%d_x%d_y%d.json.zip" % ((zoom,) + xy)
+            file_path = os.path.join(file_cache, file_name) \
+                if file_cache else ''
+            if file_path and os.path.exists(file_path):
+                cached[xy] = self._ways(json.load(gzip.open(file_path, "rt")))
+                if self._cache is not None:
+                    self._cache.put(key, cached[xy])
+            else:
+                missing.append((xy, file_path))
+
+        if missing:
+            # download all missing tiles at once and split by tile bounds
+            bounds = [tile_bounds(x, y, zoom) for (x, y), _ in missing]
+            s, w, n, e = np.array(bounds).T
+            payload = self._post_ways({
+                "south": s.min(),
+                "west": w.min(),
+                "north": n.max(),
+                "east": e.max(),
+                "timeout": timeout,
+            })
+            way_bounds = WayTable(payload).bounds
+            for ((xy, file_path), b) in zip(missing, bounds):
+                inside = intersects(way_bounds, *b).nonzero()[0]
+                items = [payload[i] for i in inside]
+                if file_path:
+                    self._dump(items, file_path)
+                cached[xy] = self._ways(items)
+                if self._cache is not None:
+                    self._cache.put(('tile', zoom) + xy, cached[xy])
+
+        # merge tiles without duplicates and filter by requested bounds
+        ways = dict()
+        for items in cached.values():
+            for w in items:
+                ways.setdefault(w.id, w)
+        ways = tuple(ways.values())
+        if not ways:
+            return ways
+        way_bounds = [w.bounds or (np.nan,) * 4 for w in ways]
+        inside = intersects(way_bounds, south, west, north, east)
+        return tuple(ways[i] for i in inside.nonzero()[0])
+
+    def _ways(self, items, table=False):
+        if table:
+            return WayTable(items)
+        if self._registry is not None:
+            return self._registry(items)
+        return tuple(Way(**w) for w in items)
 
     def _build_url(self, mth):
         return self._url + ':' + str(self._port) + '/' + mth
@@ -260,12 +554,12 @@ class Connection(object):
     def _ping(self, auth=False):
         try:
             if auth:
-                response = requests.get(
+                response = self.session.get(
                     url=self._url + ':' + str(self._port),
                     auth=self._auth,
                     verify=self._key)
             else:
-                response = requests.get(
+                response = self.session.get(
                     url=self._url + ':' + str(self._port))
         except requests.exceptions.ConnectionError as e:
             print(e)
@@ -273,21 +567,20 @@ class Connection(object):
         return response.status_code == 200
 
     def _download(self):
-        response = requests.get(
+        response = self.session.get(
             url=self._build_url('download'),
             auth=self._auth,
             timeout=self._tmt,
             verify=self._key)
         if not response.status_code == 200:
-            print('download of `get_limit` code failed')
-            print(response.status_code, response.reason, response.text)
-            raise LimitsServerError(response.text)
+            raise LimitsServerError(
+                response.text, response.status_code, response.reason)
         print('downloaded `get_limit` code')
         return response.text
 
     def _upload_from_file(self, path='string', file=None):
         if file:
-            response = requests.post(
+            response = self.session.post(
                 url=self._build_url('upload'),
                 auth=self._auth,
                 files={"filename.py": file},
@@ -295,16 +588,15 @@ class Connection(object):
                 verify=self._key)
         else:
             with open(path, "r") as file:
-                response = requests.post(
+                response = self.session.post(
                     url=self._build_url('upload'),
                     auth=self._auth,
                     files={"filename": file},
                     timeout=self._tmt,
                     verify=self._key)
         if not response.status_code == 200:
-            print('uploaded `get_limit` code from %s failed' % path)
-            print(response.status_code, response.reason, response.text)
-            raise LimitsServerError(response.text)
+            raise LimitsServerError(
+                response.text, response.status_code, response.reason)
         print('read and uploaded `get_limit` code from %s' % path)
         return True
 
@@ -331,3 +623,135 @@ class Connection(object):
                 return True
             print('failed validation of `get_limit` code with %s' % path)
         return False
+
+
+class AsyncConnection(object):
+
+    def __init__(self, username=None, password=None,
+                 url=URL, port=None, timeout=None, registry=None,
+                 concurrency=POOL_SIZE, connection=None, cache=None):
+        """ |Connection| with coroutines to run many requests concurrently
+
+        :param username: the username
+        :param password: the password
+        :param url: url to the `limits` server
+        :param port: port to connect to server
+        :param timeout: timeout for requests
+        :param registry: |WayRegistry| to share |Way| objects
+            of consecutive results (optional)
+        :param concurrency: maximal number of requests at once
+            (optional, default 10)
+        :param connection: |Connection| to use
+            (optional, by default a new |Connection| is built
+            from the other arguments with **concurrency** as pool size)
+        :param cache: |WayCache| to keep results
+            of |Connection().get_ways()| in memory (optional)
+
+        |AsyncConnection().get_ways()| and |AsyncConnection().get_limit()|
+        work as their |Connection| counterparts (including **file_cache**)
+        but as coroutines.
+
+        Note, this is no asynchronous I/O.
+        The blocking requests of the |Connection| run
+        in a :class:`concurrent.futures.ThreadPoolExecutor`
+        of **concurrency** threads
+        sharing the pooled connections of the |Connection|.
+        The coroutines only await these threads
+        and no more than **concurrency** requests run at once.
+
+        A **connection** given is used but not closed
+        by |AsyncConnection().close()|.
+
+        .. code-block:: python
+
+            >>> import asyncio
+            >>> from colimit import Location, Way
+            >>> from colimit.limits import AsyncConnection
+            >>> from colimit.server import LimitsServer
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> ways = [Way(id=1, limit=13.9, geometry=(a, b)).json]
+            >>> async def main(url, port):
+            ...     async with AsyncConnection('me', url=url, port=port) as ac:
+            ...         return await ac.gather([a, b, a.next(1000., 90.)])
+            >>> with LimitsServer(ways) as server:
+            ...     results = asyncio.run(main(server.url, server.port))
+            ... # doctest: +ELLIPSIS
+            connect as "me" to http://127.0.0.1:...
+            >>> [limit for limit, _ in results]
+            [13.9, 13.9, -1.0]
+
+        """
+        self._own_connection = connection is None
+        if connection is None:
+            connection = Connection(username, password, url, port, timeout,
+                                    registry=registry, pool_size=concurrency,
+                                    cache=cache)
+        self._connection = connection
+        self._concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphores = WeakKeyDictionary()
+
+    @property
+    def connection(self):
+        """ underlying |Connection| """
+        return self._connection
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # semaphores are bound to the event loop they are used in
+        # and dropped together with the loop
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._concurrency)
+            self._semaphores[loop] = semaphore
+        async with semaphore:
+            return await loop.run_in_executor(
+                self._executor, partial(func, *args, **kwargs))
+
+    async def get_limit(self, latitude=None, longitude=None,
+                        speed=None, direction=None, location=None, **kwargs):
+        """ invoke `get_limit` code online (see |Connection().get_limit()|)
+        """
+        return await self._run(self._connection.get_limit, latitude,
+                               longitude, speed, direction, location,
+                               **kwargs)
+
+    async def get_ways(self, *args, **kwargs):
+        """ call the `limits` database (see |Connection().get_ways()|) """
+        return await self._run(self._connection.get_ways, *args, **kwargs)
+
+    async def gather(self, locations, radius=None, **kwargs):
+        """ evaluates many locations concurrently
+
+        :param locations: sequence of |Location|
+        :param radius: if given, ways within **radius** meters
+            around each location are requested by
+            |AsyncConnection().get_ways()|
+            rather than invoking |AsyncConnection().get_limit()|
+            (optional, default **None**)
+        :param kwargs: additional arguments
+            of |AsyncConnection().get_ways()|, e.g. **file_cache**
+        :return: :class:`list` of results in order of **locations**
+        """
+        if radius is None:
+            tasks = (self.get_limit(location=g) for g in locations)
+        else:
+            tasks = (self.get_ways(latitude=g.latitude,
+                                   longitude=g.longitude,
+                                   radius=radius, **kwargs)
+                     for g in locations)
+        return list(await asyncio.gather(*tasks))
+
+    def close(self):
+        """ closes threads and, if built here, the |Connection| """
+        self._executor.shutdown(wait=True)
+        if self._own_connection:
+            self._connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        # close without blocking the running event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -11,21 +11,33 @@
 
 
 import datetime
-from math import sqrt, sin, cos, radians, degrees, acos
+from math import cos, radians
 
-from .speed import Speed
+import numpy as np
 
-__all__ = 'Location',
+from .geometry import EARTH_RADIUS, get_geometry
+from .speed import Speed, SpeedArray
 
-EARTH_RADIUS = 6378137.
+__all__ = 'Location', 'LocationArray'
 
-_cap = (lambda x: max(-1.0, min(x, 1.0)))
+_seconds = (lambda x: x.total_seconds()
+            if isinstance(x, datetime.timedelta) else float(x))
+
+
+_FIELDS = frozenset(('latitude', 'longitude', 'speed', 'direction',
+                     'timedelta', 'time', 'id'))
 
 
 class Location(object):
 
-    @staticmethod
-    def xy(latitude, longitude, distance, direction):
+    __slots__ = '_latitude', '_longitude', '_speed', '_direction', \
+        '_timedelta', '_time', '_id'
+
+    geometry = 'planar'
+    """ name of the default geometry (see |get_geometry()|) """
+
+    @classmethod
+    def xy(cls, latitude, longitude, distance, direction):
         """ function to transform location coordinate
             with distance and direction
             into location coordinate (by default as planar geometry)
@@ -35,14 +47,15 @@ class Location(object):
         :param distance: distance in meters
         :param direction: direction in degrees north
         :return: (latitude, longitude)
+
+        The geometry is given by the class attribute
+        |Location().geometry|.
         """
-        phi = radians(direction)
-        w = latitude + degrees(distance * cos(phi) / EARTH_RADIUS)
-        z = longitude + degrees(distance * sin(phi) / EARTH_RADIUS)
-        return w, z
+        return get_geometry(cls.geometry).xy(
+            latitude, longitude, distance, direction)
 
-    @staticmethod
-    def polar(latitude, longitude, lat, lon):
+    @classmethod
+    def polar(cls, latitude, longitude, lat, lon):
         """ function to transform two location coordinate
             into distance and direction (by default as planar geometry)
 
@@ -51,14 +64,11 @@ class Location(object):
         :param lat: second location latitude in degrees
         :param lon: second location longitude in degrees
         :return: (distance, direction)
+
+        The geometry is given by the class attribute
+        |Location().geometry|.
         """
-        dx = radians(lat - latitude) * EARTH_RADIUS
-        dy = radians(lon - longitude) * EARTH_RADIUS
-        r = sqrt(dx ** 2 + dy ** 2)
-        a = degrees(acos(_cap(dx / r))) if r else 0.0
-        a = a if 0. < dy else 360.0 - a
-        a = a if 0 <= a else 360 + a
-        return r, a
+        return get_geometry(cls.geometry).polar(latitude, longitude, lat, lon)
 
     def __init__(self,
                  latitude: float = 0.0,
@@ -87,6 +97,8 @@ class Location(object):
                 which can be used to derive a distance by
                 |Location().speed| * |Location().timedelta|
         :param time: timestamp (as :class:`datetime.datetime`)
+            (optional with default :meth:`datetime.datetime.now()`
+            taken lazily on first access of |Location().time|)
         :param id: object identifier (as :class:`int`)
         :param kwargs: additional or alternative arguments,
                 e.g. **lat** for **latitude**, **lon** for **longitude**,
@@ -111,16 +123,10 @@ class Location(object):
         """
         self._latitude = latitude or kwargs.get('lat', 0.0)
         self._longitude = longitude or kwargs.get('lon', 0.0)
-        self._speed = speed or kwargs.get('spd', 0.0)
+        self._speed = Speed(float(speed or kwargs.get('spd', 0.0)))
         self._direction = direction or kwargs.get('dir', 0.0)
-        if time is None:
-            time = datetime.datetime.now()
         self._time = time
-        if timedelta is None:
-            timedelta = datetime.timedelta()
-        if not isinstance(timedelta, datetime.timedelta):
-            timedelta = datetime.timedelta(seconds=float(timedelta))
-        self._timedelta = timedelta
+        self._timedelta = 0.0 if timedelta is None else _seconds(timedelta)
         self._id = id
 
     @property
@@ -146,7 +152,7 @@ class Location(object):
     @property
     def speed(self):
         """ speed value in mps """
-        return Speed(self._speed)
+        return self._speed
 
     @property
     def direction(self):
@@ -156,12 +162,14 @@ class Location(object):
     @property
     def time(self):
         """ time value """
+        if self._time is None:
+            self._time = datetime.datetime.now()
         return self._time
 
     @property
     def timedelta(self):
         """ timedelta value """
-        return self._timedelta
+        return datetime.timedelta(seconds=self._timedelta)
 
     @property
     def _dict(self):
@@ -188,6 +196,39 @@ class Location(object):
 
     # -- public methods ---
 
+    @staticmethod
+    def bounds(*locations, radius=0.0):
+        """ south, west, north and east bounds of locations
+
+        :param locations: locations to derive bounds from
+        :param radius: radius of each location in locations
+                which extends the bounds
+        :return: (:class:`float`, :class:`float`,
+            :class:`float`, :class:`float`)
+
+        The bounds are derived in a single pass over **locations**.
+        For many locations consider |LocationArray().bounds()|.
+        """
+        if not locations:
+            return None
+        g = locations[0]
+        south = north = g.latitude
+        west = east = g.longitude
+        for g in locations:
+            lat, lon = g.latitude, g.longitude
+            if lat < south:
+                south = lat
+            elif north < lat:
+                north = lat
+            if lon < west:
+                west = lon
+            elif east < lon:
+                east = lon
+        if radius:
+            south, west = Location.xy(south, west, radius, 45 + 180)
+            north, east = Location.xy(north, east, radius, 45)
+        return south, west, north, east
+
     @staticmethod
     def boundary(*locations, radius=0.0):
         """ pair tuple of south/west and north/east bounding location
@@ -199,76 +240,173 @@ class Location(object):
 
         """
         if locations:
-            south = min(g.latitude for g in locations)
-            west = min(g.longitude for g in locations)
-            north = max(g.latitude for g in locations)
-            east = max(g.longitude for g in locations)
-            south_west = Location(south, west).next(radius, 45 + 180)
-            north_east = Location(north, east).next(radius, 45)
-            return south_west, north_east
+            south, west, north, east = \
+                Location.bounds(*locations, radius=radius)
+            return Location(south, west), Location(north, east)
 
     @staticmethod
-    def center(*locations, radius=0.0):
+    def center(*locations, radius=0.0, bounds=None):
         """ center of locations boundary
 
         :param locations:  locations to derive center from
         :param radius: radius of each location in locations
                 which extends the boundary
+        :param bounds: bounds as given by |Location().bounds()|
+                to use instead of **locations** (optional)
         :return: |Location|
         """
-        south_west, north_east = Location.boundary(*locations, radius=radius)
-        lat = (north_east.latitude - south_west.latitude)/2
-        lon = (north_east.longitude - south_west.longitude)/2
-        return Location(south_west.latitude + lat, south_west.longitude + lon)
+        if bounds is None:
+            bounds = Location.bounds(*locations, radius=radius)
+        south, west, north, east = bounds
+        return Location(south + (north - south) / 2,
+                        west + (east - west) / 2)
 
     @staticmethod
-    def diameter(*locations, radius=0.0):
-        south_west, north_east = Location.boundary(*locations, radius=radius)
-        south_east = Location(south_west.latitude, north_east.longitude)
-        north_west = Location(north_east.latitude, south_west.longitude)
-        dx, _ = Location.polar(*south_west.coordinate, *south_east.coordinate)
-        dy, _ = Location.polar(*south_west.coordinate, *north_west.coordinate)
+    def diameter(*locations, radius=0.0, bounds=None):
+        """ west-to-east and south-to-north diameter of locations boundary
+
+        :param locations:  locations to derive diameter from
+        :param radius: radius of each location in locations
+                which extends the boundary
+        :param bounds: bounds as given by |Location().bounds()|
+                to use instead of **locations** (optional)
+        :return: (:class:`float`, :class:`float`)
+        """
+        if bounds is None:
+            bounds = Location.bounds(*locations, radius=radius)
+        south, west, north, east = bounds
+        dx, _ = Location.polar(south, west, south, east)
+        dy, _ = Location.polar(south, west, north, west)
         return dx, dy
 
+    @staticmethod
+    def unique(*locations, tolerance=None):
+        """ locations without duplicates (keeping first occurrences in order)
+
+        :param locations: locations to deduplicate
+        :param tolerance: grid size in meters to consider locations
+            as equal (optional, default **None** for exact equality),
+            see |Location().key()|
+        :return: :class:`tuple` (|Location|)
+        """
+        unique = dict()
+        for g in locations:
+            unique.setdefault(g.key(tolerance), g)
+        return tuple(unique.values())
+
+    def key(self, tolerance=None):
+        """ hashable key which defines equality and hash of |Location|
+
+        :param tolerance: grid size in meters
+            (optional, default **None**)
+        :return: :class:`tuple`
+
+        Without **tolerance** the key is the tuple
+        (**id**, **latitude**, **longitude**,
+        **speed**, **direction**, **timedelta**)
+        where **timedelta** is given in seconds.
+        Note, **time** is not part of the key.
+
+        With **tolerance** the key is the tuple
+        (**id**, **i**, **j**) of the location **id** and
+        the grid cell **i**, **j** of size **tolerance** meters
+        the coordinate falls into. So any two locations with same **id**
+        and coordinates in the same cell have the same key.
+
+        .. code-block:: python
+
+            >>> from colimit import Location
+            >>> h_da = Location(latitude=49.86722, longitude=8.638495)
+            >>> h_da.key(tolerance=10.)
+            (0, 555119, 96163)
+            >>> h_da.next(2., 0.).key(tolerance=10.)
+            (0, 555119, 96163)
+            >>> h_da == h_da.next(2., 0.)
+            False
+
+        """
+        if tolerance is None:
+            return self._id, self._latitude, self._longitude, \
+                self._speed, self._direction, self._timedelta
+        scale = radians(EARTH_RADIUS) / tolerance
+        return self._id, \
+            int(self._latitude * scale // 1), int(self._longitude * scale // 1)
+
     def clone(self, **kwargs):
         """ clones a |Location| object with optional argument overwrites
 
         :param kwargs: optional Location argument overwrites
         :return: |Location|
-        """
-        self_dict = self._dict
-        self_dict.update(kwargs)
-        return self.__class__(**self_dict)
 
-    def dist(self, other=None):
+        Clones copy the instance slots directly
+        without invoking the constructor.
+        Only if **kwargs** contains other arguments than
+        **latitude**, **longitude**, **speed**, **direction**,
+        **timedelta**, **time** and **id**
+        or a subclass defines its own constructor,
+        the clone is built by the constructor.
+        """
+        cls = self.__class__
+        if cls.__init__ is not Location.__init__ or kwargs.keys() - _FIELDS:
+            self_dict = self._dict
+            self_dict.update(kwargs)
+            return cls(**self_dict)
+        other = object.__new__(cls)
+        other._latitude = kwargs.get('latitude', self._latitude)
+        other._longitude = kwargs.get('longitude', self._longitude)
+        if 'speed' in kwargs:
+            other._speed = Speed(float(kwargs['speed']))
+        else:
+            other._speed = self._speed
+        other._direction = kwargs.get('direction', self._direction)
+        # resolve the time, so the clone shares it even if not given
+        other._time = kwargs.get('time', self.time)
+        if 'timedelta' in kwargs:
+            timedelta = kwargs['timedelta']
+            timedelta = 0.0 if timedelta is None else _seconds(timedelta)
+        else:
+            timedelta = self._timedelta
+        other._timedelta = timedelta
+        other._id = kwargs.get('id', self._id)
+        return other
+
+    def dist(self, other=None, geometry=None):
         """ distance to another |Location| object
 
         :param other: location (optional with default |Location()|
+        :param geometry: geometry to use (optional with default
+            |Location().geometry|, see |get_geometry()|)
         :return: :class:`float` (distance in meters)
 
         transformation makes use of geometry class property
         |Location().polar()| which sets the underlying geometry
         """
         other = self.__class__() if other is None else other
-        return self.__class__.polar(*self.coordinate, *other.coordinate)[0]
+        polar = self._geometry(geometry).polar
+        return polar(*self.coordinate, *other.coordinate)[0]
 
-    def dir(self, other=None):
+    def dir(self, other=None, geometry=None):
         """ direction to another |Location| object
 
         :param other: location (optional with default |Location()|
+        :param geometry: geometry to use (optional with default
+            |Location().geometry|, see |get_geometry()|)
         :return: :class:`float` (distance in meters)
 
         transformation makes use of geometry class property
         |Location().polar()| which sets the underlying geometry
         """
         other = self.__class__() if other is None else other
-        return self.__class__.polar(*self.coordinate, *other.coordinate)[1]
+        polar = self._geometry(geometry).polar
+        return polar(*self.coordinate, *other.coordinate)[1]
 
-    def diff(self, other, **kwargs):
+    def diff(self, other, geometry=None, **kwargs):
         """ difference to another location
             expressed as |Location| with speed, direction and timedelta
 
         :param other: the other location
+        :param geometry: geometry to use (optional with default
+            |Location().geometry|, see |get_geometry()|)
         :param kwargs: optional Location argument overwrites
             (except **speed** and **direction**)
         :return: |Location|
@@ -292,14 +430,20 @@ class Location(object):
         """
         # build location to get in time from self to other
         other = self.__class__() if other is None else other
-        dist, drc = self.__class__.polar(*self.coordinate, *other.coordinate)
-        td = kwargs.pop('timedelta', other.time - self.time)
+        polar = self._geometry(geometry).polar
+        dist, drc = polar(*self.coordinate, *other.coordinate)
+        td = kwargs.pop('timedelta', None)
+        if td is None:
+            # read own time first as times are set on first access
+            time = self.time
+            td = other.time - time
         if isinstance(td, datetime.timedelta):
             td = td.total_seconds()
         spd = dist / td if td else 0.0
         return self.clone(speed=spd, direction=drc, timedelta=td, **kwargs)
 
-    def next(self, radius=None, direction=None, timedelta=None, **kwargs):
+    def next(self, radius=None, direction=None, timedelta=None,
+             geometry=None, **kwargs):
         """ location in given distance and direction
 
         :param radius: distance in meters
@@ -308,6 +452,8 @@ class Location(object):
             (optional with default |Location().direction|)
         :param timedelta: time period of motion
             (optional with default |Location().timedelta|)
+        :param geometry: geometry to use (optional with default
+            |Location().geometry|, see |get_geometry()|)
         :param kwargs: optional Location argument overwrites
             (except **latitude**, **longitude** and **time**)
         :return: |Location|
@@ -316,18 +462,104 @@ class Location(object):
         |Location().xy()| which sets the underlying geometry
         """
         if timedelta is None:
-            timedelta = self.timedelta
+            timedelta = self._timedelta
         if isinstance(timedelta, datetime.timedelta):
             timedelta = timedelta.total_seconds()
         if radius is None:
-            radius = self.speed.mps * timedelta
+            radius = self._speed * timedelta
         if direction is None:
             direction = self.direction
-        lat, lon = self.__class__.xy(*self.coordinate, radius, direction)
+        xy = self._geometry(geometry).xy
+        lat, lon = xy(*self.coordinate, radius, direction)
         tm = self.time + datetime.timedelta(seconds=timedelta)
         return self.clone(latitude=lat, longitude=lon, time=tm, **kwargs)
 
-    def project(self, a, b=None, segment=False):
+    def rollout(self, times=None, distances=None, turn_rate=None,
+                acceleration=None, geometry=None):
+        """ predicted trajectory by dead reckoning
+
+        :param times: time periods in seconds from |Location().time|
+            in ascending order to predict locations at
+        :param distances: alternative to **times**,
+            distances in meters along the trajectory
+            in ascending order to predict locations at
+        :param turn_rate: constant rate of change of direction
+            in degrees per second (clockwise)
+            (optional, default **None** for no turn)
+        :param acceleration: constant rate of change of speed
+            in meter per second squared
+            (optional, default **None** for constant speed).
+            Decelerating motion stops at zero speed.
+        :param geometry: geometry to use (optional with default
+            |Location().geometry|, see |get_geometry()|)
+        :return: |LocationArray|
+
+        Without **turn_rate** and **acceleration**
+        the trajectory meets repeated calls of |Location().next()|.
+        With **turn_rate** at constant speed, the trajectory is the exact
+        circular arc.
+        With both, each step between consecutive predicted locations
+        is approximated by such an arc.
+
+        .. code-block:: python
+
+            >>> from colimit import Location
+            >>> h_da = Location(latitude=49.86722, longitude=8.638495,
+            ...                 speed=10., direction=90.)
+            >>> h_da.next(timedelta=3).coordinate == h_da.rollout((3,))[0].coordinate
+            True
+            >>> trajectory = h_da.rollout(range(1, 11), turn_rate=9.)
+            >>> round(float(trajectory.direction[-1]), 3)
+            180.0
+            >>> south, west, north, east = trajectory.bounds(radius=20.)
+
+        """  # noqa E501
+        v = self._speed
+        a = float(acceleration or 0.0)
+        if times is None:
+            if distances is None:
+                raise ValueError('either times or distances must be given')
+            d = np.asarray(distances, dtype=float)
+            if a:
+                t_stop = -v / a if a < 0. else np.inf
+                disc = v * v + 2. * a * d
+                with np.errstate(invalid='ignore'):
+                    t = (np.sqrt(disc) - v) / a
+                t = np.where(disc < 0., t_stop, t)
+            elif v:
+                t = d / v
+            else:
+                raise ValueError('distances require speed or acceleration')
+        else:
+            t = np.asarray(times, dtype=float)
+
+        # speed and distance at times
+        tt = np.minimum(t, -v / a) if a < 0. else t
+        spd = np.maximum(v + a * tt, 0.0)
+        dist = v * tt + 0.5 * a * tt * tt
+        drc = self._direction + float(turn_rate or 0.0) * t
+
+        # sum up chords of arcs between consecutive locations
+        ds = np.diff(dist, prepend=0.0)
+        dh = np.radians(np.diff(drc, prepend=self._direction))
+        mid = np.radians(drc) - dh * 0.5
+        chord = ds * np.sinc(dh / (2. * np.pi))
+        x = np.cumsum(chord * np.sin(mid))
+        y = np.cumsum(chord * np.cos(mid))
+
+        xy = self._xy_array(geometry)
+        lat, lon = xy(self._latitude, self._longitude,
+                      np.hypot(x, y), np.degrees(np.arctan2(x, y)))
+        us = np.round(t * 1e6).astype('timedelta64[us]')
+        return LocationArray(latitude=lat,
+                             longitude=lon,
+                             speed=spd,
+                             direction=drc % 360.0,
+                             timedelta=self._timedelta,
+                             time=np.datetime64(self.time, 'us') + us,
+                             id=self._id)
+
+    def project(self, a, b=None, segment=False, frame=None):
         """ projects location onto line given by two location **a** and **b**
 
         :param a: first |Location| defining the line to project to
@@ -338,6 +570,10 @@ class Location(object):
             i.e. if projected **p** doesn't fall between **a** and **b**,
             the returning location will have coordinates of
             either **a** or **b**. (optional, default False)
+        :param frame: |LocalFrame| to run the projection in
+            (optional, default **None**).
+            If given, the projection uses the cached metric coordinates
+            of the frame instead of plain latitude and longitude degrees.
         :return: **p** |Location| projected onto line by **a** and **b**
             pointing in direction from **a** to **b**
             with the projected speed in such direction.
@@ -357,6 +593,8 @@ class Location(object):
             True
 
         """  # noqa E501
+        if frame is not None:
+            return frame.project(self, a, b, segment)
         b = a.next() if b is None else b
         if a == b:
             return a
@@ -394,15 +632,29 @@ class Location(object):
 
     # --- private methods ---
 
+    def _geometry(self, geometry=None):
+        if geometry is None:
+            return self.__class__
+        return get_geometry(geometry)
+
+    @classmethod
+    def _xy_array(cls, geometry=None):
+        # vectorized xy of the class (honouring overrides of xy)
+        if geometry is not None:
+            return get_geometry(geometry).xy_array
+        if cls.xy.__func__ is Location.xy.__func__:
+            return get_geometry(cls.geometry).xy_array
+        return np.vectorize(cls.xy)
+
     def __str__(self):
         ret = "Location(%08.6f,%009.6f)" % (self._latitude, self._longitude)
         if self._speed or self._direction:
             ret += ' with speed %0.1f km/h in direction %0.2f°' \
                    % (self.speed.kmh, self._direction)
-        if self._time:
+        if self.time:
             ret += ' at %s' % self._time.strftime('%y-%m-%d:%H-%M-%S')
         if self._timedelta:
-            ret += ' plus %0.3fs' % self._timedelta.total_seconds()
+            ret += ' plus %0.3fs' % self._timedelta
         return ret
 
     def __repr__(self):
@@ -413,11 +665,366 @@ class Location(object):
 
     def __bool__(self):
         return any((self.latitude, self.longitude,
-                    self.speed, self.direction, self.timedelta))
+                    self._speed, self._direction, self._timedelta))
 
     def __eq__(self, other):
-        a = self.json
-        o = other.json
-        a.pop('time')
-        o.pop('time')
-        return a == o
+        if not isinstance(other, Location):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+
+class LocationArray(object):
+
+    geometry = 'planar'
+    """ name of the default geometry (see |get_geometry()|) """
+
+    @classmethod
+    def xy(cls, latitude, longitude, distance, direction):
+        """ vectorized version of |Location().xy()|
+
+        :param latitude: location latitudes in degrees
+        :param longitude: location longitudes in degrees
+        :param distance: distances in meters
+        :param direction: directions in degrees north
+        :return: (latitude, longitude) as pair of :class:`numpy.ndarray`
+        """
+        return get_geometry(cls.geometry).xy_array(
+            latitude, longitude, distance, direction)
+
+    @classmethod
+    def polar(cls, latitude, longitude, lat, lon):
+        """ vectorized version of |Location().polar()|
+
+        :param latitude: first location latitudes in degrees
+        :param longitude: first location longitudes in degrees
+        :param lat: second location latitudes in degrees
+        :param lon: second location longitudes in degrees
+        :return: (distance, direction) as pair of :class:`numpy.ndarray`
+        """
+        return get_geometry(cls.geometry).polar_array(
+            latitude, longitude, lat, lon)
+
+    def __init__(self,
+                 latitude=(),
+                 longitude=0.0,
+                 speed=0.0,
+                 direction=0.0,
+                 timedelta=0.0,
+                 time=None,
+                 id=0):
+        """ array of points on earth with time, speed and direction
+
+        :param latitude: latitudes in degrees
+        :param longitude: longitudes in degrees
+        :param speed: speed values in mps
+        :param direction: directions in degrees north
+        :param timedelta: time periods in seconds
+        :param time: timestamps (as :class:`numpy.datetime64`
+            or :class:`datetime.datetime`)
+            with missing values as `NaT` (optional with default `NaT`)
+        :param id: object identifiers (node ids)
+
+        Each argument is stored as contiguous :class:`numpy.ndarray`
+        (struct-of-arrays) and scalar arguments are broadcast
+        to the length of **latitude**.
+        Arrays of matching type are stored without copying them.
+
+        The methods
+        |LocationArray().dist()|, |LocationArray().dir()|,
+        |LocationArray().diff()| and |LocationArray().next()|
+        work as their |Location| counterparts
+        but on all points at once.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, LocationArray
+            >>> h_da = Location(latitude=49.86722, longitude=8.638495)
+            >>> tu_da = Location(latitude=49.87515, longitude=8.658122)
+            >>> arr = LocationArray.from_locations(h_da, tu_da)
+            >>> len(arr)
+            2
+            >>> arr.dist(h_da).round(3)
+            array([   0.   , 2356.463])
+            >>> arr[1] == tu_da
+            True
+
+        """
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=float))
+        n = len(latitude)
+        self._latitude = latitude
+        self._longitude = self._column(longitude, n)
+        self._speed = self._column(speed, n)
+        self._direction = self._column(direction, n)
+        self._timedelta = self._column(timedelta, n)
+        if time is None:
+            time = np.full(n, 'NaT', dtype='datetime64[us]')
+        self._time = self._column(time, n, 'datetime64[us]')
+        self._id = self._column(id, n, np.int64)
+
+    @staticmethod
+    def _column(value, n, dtype=float):
+        value = np.asarray(value, dtype=dtype)
+        if value.ndim == 0:
+            return np.full(n, value, dtype=dtype)
+        if not len(value) == n:
+            raise ValueError('all columns must have the same length')
+        return value
+
+    @classmethod
+    def from_locations(cls, *locations):
+        """ builds |LocationArray| from |Location| objects
+
+        :param locations: locations to store
+        :return: |LocationArray|
+        """
+        return cls(
+            latitude=[g.latitude for g in locations],
+            longitude=[g.longitude for g in locations],
+            speed=[float(g.speed) for g in locations],
+            direction=[g.direction for g in locations],
+            timedelta=[g.timedelta.total_seconds() for g in locations],
+            time=np.array([g.time for g in locations],
+                          dtype='datetime64[us]'),
+            id=[g.id for g in locations])
+
+    @property
+    def latitude(self):
+        """ latitudes in degrees """
+        return self._latitude
+
+    @property
+    def longitude(self):
+        """ longitudes in degrees """
+        return self._longitude
+
+    @property
+    def coordinate(self):
+        """ pair tuple
+            (|LocationArray().latitude|, |LocationArray().longitude|) """
+        return self._latitude, self._longitude
+
+    @property
+    def speed(self):
+        """ speed values in mps (as |SpeedArray|) """
+        return self._speed.view(SpeedArray)
+
+    @property
+    def direction(self):
+        """ directions in degrees north """
+        return self._direction
+
+    @property
+    def time(self):
+        """ timestamps as :class:`numpy.datetime64` """
+        return self._time
+
+    @property
+    def timedelta(self):
+        """ time periods in seconds """
+        return self._timedelta
+
+    @property
+    def id(self):
+        """ location identifiers (node ids) """
+        return self._id
+
+    @property
+    def locations(self):
+        """ tuple of |Location| """
+        return tuple(self)
+
+    # -- public methods ---
+
+    def clone(self, **kwargs):
+        """ clones a |LocationArray| object with optional argument overwrites
+
+        :param kwargs: optional LocationArray argument overwrites
+        :return: |LocationArray|
+        """
+        self_dict = {
+            'latitude': self._latitude,
+            'longitude': self._longitude,
+            'speed': self._speed,
+            'direction': self._direction,
+            'timedelta': self._timedelta,
+            'time': self._time,
+            'id': self._id
+        }
+        self_dict.update(kwargs)
+        return self.__class__(**self_dict)
+
+    def dist(self, other=None, geometry=None):
+        """ distances to another |Location| or |LocationArray|
+
+        :param other: location or locations
+            (optional with default |Location()|)
+        :param geometry: geometry to use (optional with default
+            |LocationArray().geometry|, see |get_geometry()|)
+        :return: :class:`numpy.ndarray` (distances in meters)
+        """
+        other = Location() if other is None else other
+        polar = self._polar(geometry)
+        return polar(*self.coordinate, *other.coordinate)[0]
+
+    def dir(self, other=None, geometry=None):
+        """ directions to another |Location| or |LocationArray|
+
+        :param other: location or locations
+            (optional with default |Location()|)
+        :param geometry: geometry to use (optional with default
+            |LocationArray().geometry|, see |get_geometry()|)
+        :return: :class:`numpy.ndarray` (directions in degrees north)
+        """
+        other = Location() if other is None else other
+        polar = self._polar(geometry)
+        return polar(*self.coordinate, *other.coordinate)[1]
+
+    def diff(self, other, geometry=None, **kwargs):
+        """ difference to another location or locations
+            expressed as |LocationArray|
+            with speed, direction and timedelta
+
+        :param other: |Location| or |LocationArray|
+        :param geometry: geometry to use (optional with default
+            |LocationArray().geometry|, see |get_geometry()|)
+        :param kwargs: optional LocationArray argument overwrites
+            (except **speed** and **direction**)
+        :return: |LocationArray|
+
+        To get the motion along a track given as |LocationArray| **arr**
+        use **arr[:-1].diff(arr[1:])**.
+        """
+        polar = self._polar(geometry)
+        dist, drc = polar(*self.coordinate, *other.coordinate)
+        td = kwargs.pop('timedelta', None)
+        if td is None:
+            td = np.asarray(other.time, dtype='datetime64[us]') - self._time
+            td = td / np.timedelta64(1, 's')
+        td = np.broadcast_to(np.asarray(td, dtype=float), dist.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spd = np.where(np.nan_to_num(td) != 0., dist / td, 0.0)
+        return self.clone(speed=spd, direction=drc,
+                          timedelta=np.nan_to_num(td), **kwargs)
+
+    def next(self, radius=None, direction=None, timedelta=None,
+             geometry=None, **kwargs):
+        """ locations in given distances and directions
+
+        :param radius: distances in meters
+            (optional with default
+            |LocationArray().speed| * **timedelta**)
+        :param direction: directions in cardinal degrees
+            (optional with default |LocationArray().direction|)
+        :param timedelta: time periods of motion in seconds
+            (optional with default |LocationArray().timedelta|)
+        :param geometry: geometry to use (optional with default
+            |LocationArray().geometry|, see |get_geometry()|)
+        :param kwargs: optional LocationArray argument overwrites
+            (except **latitude**, **longitude** and **time**)
+        :return: |LocationArray|
+        """
+        if timedelta is None:
+            timedelta = self._timedelta
+        if radius is None:
+            radius = self._speed * timedelta
+        if direction is None:
+            direction = self._direction
+        xy = self._xy(geometry)
+        lat, lon = xy(*self.coordinate, radius, direction)
+        us = np.round(np.multiply(timedelta, 1e6)).astype('timedelta64[us]')
+        tm = self._time + us
+        return self.clone(latitude=lat, longitude=lon, time=tm, **kwargs)
+
+    def bounds(self, radius=0.0, offsets=None):
+        """ south, west, north and east bounds of locations
+
+        :param radius: radius of each location
+                which extends the bounds
+        :param offsets: start indices of consecutive groups of locations
+            (optional, default **None**), e.g. the first node of each way
+            when the nodes of many ways are stored in one |LocationArray|.
+            A trailing total number of locations
+            (as in |WayTable().offsets|) ends the last group.
+        :return: (**south**, **west**, **north**, **east**)
+            as :class:`float` or, if **offsets** are given,
+            as :class:`numpy.ndarray` with the bounds of each group
+
+        Bounds are derived by a min/max reduction
+        over the contiguous coordinate arrays.
+        Empty groups have bounds of `nan`.
+        """
+        if not len(self):
+            return None
+        lat, lon = self._latitude, self._longitude
+        if offsets is None:
+            south, west = float(lat.min()), float(lon.min())
+            north, east = float(lat.max()), float(lon.max())
+            if radius:
+                south, west = Location.xy(south, west, radius, 45 + 180)
+                north, east = Location.xy(north, east, radius, 45)
+            return south, west, north, east
+        offsets = np.asarray(offsets, dtype=np.intp)
+        if len(offsets) and offsets[-1] == len(self):
+            offsets = offsets[:-1]
+        start, stop = offsets, np.append(offsets[1:], len(self))
+        full = start < stop
+        south, west, north, east = np.full((4, len(offsets)), np.nan)
+        if full.any():
+            # reduceat gives single items for empty groups
+            south[full] = np.minimum.reduceat(lat, start[full])
+            west[full] = np.minimum.reduceat(lon, start[full])
+            north[full] = np.maximum.reduceat(lat, start[full])
+            east[full] = np.maximum.reduceat(lon, start[full])
+        if radius:
+            south, west = self.__class__.xy(south, west, radius, 45 + 180)
+            north, east = self.__class__.xy(north, east, radius, 45)
+        return south, west, north, east
+
+    # --- private methods ---
+
+    def _polar(self, geometry=None):
+        if geometry is None:
+            return self.__class__.polar
+        return get_geometry(geometry).polar_array
+
+    def _xy(self, geometry=None):
+        if geometry is None:
+            return self.__class__.xy
+        return get_geometry(geometry).xy_array
+
+    def _location(self, i):
+        time = self._time[i]
+        time = None if np.isnat(time) else time.astype(datetime.datetime)
+        return Location(latitude=float(self._latitude[i]),
+                        longitude=float(self._longitude[i]),
+                        speed=float(self._speed[i]),
+                        direction=float(self._direction[i]),
+                        timedelta=float(self._timedelta[i]),
+                        time=time,
+                        id=int(self._id[i]))
+
+    def __str__(self):
+        return "LocationArray(%d)" % len(self)
+
+    def __repr__(self):
+        return str(self)
+
+    def __len__(self):
+        return len(self._latitude)
+
+    def __iter__(self):
+        return (self._location(i) for i in range(len(self)))
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._location(item)
+        return self.__class__(latitude=self._latitude[item],
+                              longitude=self._longitude[item],
+                              speed=self._speed[item],
+                              direction=self._direction[item],
+                              timedelta=self._timedelta[item],
+                              time=self._time[item],
+                              id=self._id[item])
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+from collections import OrderedDict
+from threading import Lock
+
+from .way import Way
+
+__all__ = 'WayRegistry',
+
+MAXSIZE = 10000
+
+
+class WayRegistry(object):
+
+    def __init__(self, maxsize=MAXSIZE):
+        """ registry to share |Way| objects of overlapping results
+
+        :param maxsize: maximal number of ways to keep
+            (optional, default is 10000)
+
+        Ways are interned by |Way().id| and |Way().digest|, i.e.
+        an equal way given again is replaced by the registered one.
+        So consecutive results of |Connection().get_ways()|
+        for nearby positions share one object per way
+        including its cached geometry, arrays and segments.
+
+        If more than **maxsize** ways are registered,
+        the least recently used ones are dropped.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> from colimit.registry import WayRegistry
+            >>> registry = WayRegistry(maxsize=2)
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> way = registry.intern(Way(id=1, geometry=(a, b)))
+            >>> registry.intern(Way(id=1, geometry=(a, b))) is way
+            True
+            >>> registry.hits, registry.misses
+            (1, 1)
+
+        """
+        self._maxsize = maxsize
+        self._ways = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        """ maximal number of ways to keep """
+        return self._maxsize
+
+    def intern(self, way):
+        """ registered way equal to given way
+
+        :param way: |Way| or dictionary of |Way| arguments
+        :return: |Way|
+
+        If no equal way is registered, **way** is registered
+        and returned.
+        """
+        if not isinstance(way, Way):
+            way = Way(**way)
+        key = way.id, way.digest
+        with self._lock:
+            registered = self._ways.get(key)
+            if registered is not None:
+                self._ways.move_to_end(key)
+                self.hits += 1
+                return registered
+            self._ways[key] = way
+            self.misses += 1
+            while self._maxsize < len(self._ways):
+                self._ways.popitem(last=False)
+        return way
+
+    def clear(self):
+        """ drops all registered ways """
+        with self._lock:
+            self._ways.clear()
+
+    def __call__(self, ways):
+        """ registered ways (see |WayRegistry().intern()|) as tuple """
+        return tuple(self.intern(w) for w in ways)
+
+    def __contains__(self, item):
+        if isinstance(item, Way):
+            return (item.id, item.digest) in self._ways
+        return False
+
+    def __len__(self):
+        return len(self._ways)
+
+    def __repr__(self):
+        return "%s(%d/%d)" % \
+            (self.__class__.__name__, len(self._ways), self._maxsize)
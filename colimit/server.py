@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from .location import Location
+from .table import WayTable
+from .tiles import around, intersects
+
+__all__ = 'LimitsServer',
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'  # keep connections alive
+    disable_nagle_algorithm = True  # headers and body are sent separately
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, status=200, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        if self.path in ('', '/'):
+            self._send(b'colimit', content_type='text/plain')
+        elif self.path == '/download':
+            self._send(self.server.code.encode(), content_type='text/plain')
+        else:
+            self._send(b'not found', 404, 'text/plain')
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == '/upload':
+            self.server.upload = body
+            self._send(b'ok', content_type='text/plain')
+            return
+        method = getattr(self.server, self.path.strip('/'), None)
+        if self.path not in self.server.methods or method is None:
+            self._send(b'not found', 404, 'text/plain')
+            return
+        try:
+            result = method(**json.loads(body or b'{}'))
+        except Exception as e:
+            self._send(str(e).encode(), 500, 'text/plain')
+            return
+        self._send(result)
+
+
+class LimitsServer(ThreadingHTTPServer):
+
+    methods = '/get_ways', '/get_limit', '/get_limits'
+
+    def __init__(self, ways=(), get_limit=None, code='',
+                 host='127.0.0.1', port=0):
+        """ local stand-in for the `limits` server
+
+        :param ways: list of dictionaries of |Way| arguments
+            as served by |LimitsServer().get_ways()|
+        :param get_limit: `get_limit` function invoked
+            by |LimitsServer().get_limit()| (optional, default returns
+            the limit of the nearest way within 25 meters)
+        :param code: `get_limit` code served for download (optional)
+        :param host: host to listen on (optional, default `127.0.0.1`)
+        :param port: port to listen on (optional, default is any free port)
+
+        The server speaks the same json protocol as the `limits` server,
+        so a |Connection| can be tested offline
+        (authentication is not checked).
+        Connections are kept alive and requests are served in threads.
+
+        .. code-block:: python
+
+            >>> from colimit import Connection
+            >>> from colimit.server import LimitsServer
+            >>> with LimitsServer() as server:
+            ...     connection = Connection('me', url=server.url,
+            ...                             port=server.port)
+            ...     connection.online  # doctest: +ELLIPSIS
+            connect as "me" to http://127.0.0.1:...
+            True
+
+        """
+        super().__init__((host, port), _Handler)
+        self.daemon_threads = True
+        self._payload = list(ways)
+        self._table = WayTable(self._payload)
+        self._get_limit = get_limit or self._nearest_limit
+        self.code = code
+        self.upload = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """ url of server (without port) """
+        return 'http://%s' % self.server_address[0]
+
+    @property
+    def port(self):
+        """ port of server """
+        return self.server_address[1]
+
+    def start(self):
+        """ starts serving in a background thread """
+        if self._thread is None:
+            self._thread = Thread(target=self.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """ stops serving and closes the socket """
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def get_ways(self, latitude=None, longitude=None, radius=None,
+                 south=None, west=None, north=None, east=None, **kwargs):
+        """ ways with bounding box intersecting the requested bounds
+
+        :return: dictionary with **ways** as list of dictionaries
+
+        Arguments are as given by |Connection().get_ways()|.
+        """
+        if not all(v is not None for v in (south, west, north, east)):
+            if latitude is None or longitude is None:
+                return {'ways': list(self._payload)}
+            south, west, north, east = around(
+                latitude, longitude, radius or 0.0)
+        inside = intersects(self._table.bounds, south, west, north, east)
+        return {'ways': [self._payload[i] for i in inside.nonzero()[0]]}
+
+    def get_limit(self, latitude=0.0, longitude=0.0, speed=0.0,
+                  direction=0.0, **kwargs):
+        """ result of `get_limit` function
+
+        :return: dictionary with **limit** and **ways**
+            as list of dictionaries
+
+        Arguments are as given by |Connection().get_limit()|.
+        """
+        result = self._get_limit(latitude=latitude, longitude=longitude,
+                                 speed=speed, direction=direction,
+                                 get_ways=self._get_ways)
+        limit, ways = result if isinstance(result, tuple) else (result, ())
+        return {'limit': float(limit), 'ways': [w.json for w in ways]}
+
+    def get_limits(self, locations=(), **kwargs):
+        """ results of `get_limit` function for many locations
+
+        :param locations: list of dictionaries of arguments
+            of |LimitsServer().get_limit()|
+        :return: dictionary with **results** as list of results
+            of |LimitsServer().get_limit()| in order of **locations**
+
+        Used by |Connection().get_limits()|.
+        """
+        return {'results': [self.get_limit(**g) for g in locations]}
+
+    def _get_ways(self, **kwargs):
+        return tuple(WayTable(self.get_ways(**kwargs)['ways']))
+
+    @staticmethod
+    def _nearest_limit(latitude, longitude, speed, direction, get_ways):
+        location = Location(latitude, longitude)
+        ways = [w for w in get_ways(latitude=latitude, longitude=longitude,
+                                    radius=25.) if len(w)]
+        if not ways:
+            return -1.0, ()
+        ways.sort(key=lambda w: w.project(location)[2])
+        return float(ways[0].limit), tuple(ways)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -10,7 +10,9 @@
 # License:  No License - only for h_da staff or students (see LICENSE file)
 
 
-__all__ = 'Speed',
+import numpy as np
+
+__all__ = 'Speed', 'SpeedArray'
 
 MPS = {
     'mps': 1.0,
@@ -21,11 +23,13 @@ MPS = {
 }
 
 
-class Speed(object):
+class Speed(float):
+
+    __slots__ = ()
 
-    def __init__(self,
-                 speed: float = 0.0,
-                 unit: str = 'mps'):
+    def __new__(cls,
+                speed: float = 0.0,
+                unit: str = 'mps'):
         """ extending :class:`float` by speed unit conversion
 
         :param speed:   absolut speed value
@@ -38,79 +42,120 @@ class Speed(object):
                             * `fts` (feet per second)
                             * `knots` (knots as 1.94384 `mps`
 
-        |Speed()| instances can be added, subtracted, multiplied, divided
-        and compared.
+        |Speed()| instances are :class:`float` values in `mps`.
+        So they can be added, subtracted, multiplied, divided
+        and compared as :class:`float` without any overhead
+        and the results are plain :class:`float` values in `mps`.
 
         """
-        if not isinstance(speed, (float, Speed, int)):
+        if not isinstance(speed, (float, int)):
             raise ValueError('Speed value must be float not %s' % type(speed))
+        if unit == 'mps':
+            return float.__new__(cls, speed)
         if unit in MPS:
-            speed = float(speed) / MPS[unit]
-        else:
-            raise ValueError('Speed unit must be of %s' % str(MPS))
-        self._unit = unit
-        self._value = speed
+            return float.__new__(cls, speed / MPS[unit])
+        raise ValueError('Speed unit must be of %s' % str(MPS))
 
     @property
     def mps(self) -> float:
         """ speed value in `mps` """
-        return self._value * MPS['mps']
+        return float(self)
 
     @property
     def kmh(self) -> float:
         """ speed value in `kmh` """
-        return self._value * MPS['kmh']
+        return self * MPS['kmh']
 
     @property
     def mph(self) -> float:
         """ speed value in `mph` """
-        return self._value * MPS['mph']
+        return self * MPS['mph']
 
     @property
     def fts(self) -> float:
         """ speed value in `fts` """
-        return self._value * MPS['fts']
+        return self * MPS['fts']
 
     @property
     def knots(self) -> float:
         """ speed value in `knots` """
-        return self._value * MPS['knots']
-
-    def __float__(self):
-        return self.mps
+        return self * MPS['knots']
 
     def __str__(self):
-        if self.mps < 0:
+        if self < 0:
             return "no information"
         return '%0.2f mps (%0.2f km/h or %0.2f mph)' % \
-               (self.mps, self.kmh, self.mph)
+               (self, self.kmh, self.mph)
 
     def __repr__(self):
         return str(self)
 
-    def __add__(self, other):
-        return Speed(float(self).__add__(float(other)))
 
-    def __sub__(self, other):
-        return Speed(float(self).__sub__(float(other)))
+class SpeedArray(np.ndarray):
+
+    def __new__(cls, speed=(), unit='mps'):
+        """ extending :class:`numpy.ndarray` by speed unit conversion
+
+        :param speed: absolut speed values
+        :param unit: unit of speed values (optional with default `mps`),
+            see |Speed()|
+
+        Values are stored in `mps` and can be converted into other units
+        by the properties |SpeedArray().kmh|, |SpeedArray().mph|, etc.
+        at once.
+        As for |Speed|, results of arithmetic operations
+        are plain :class:`numpy.ndarray` values in `mps`.
+        Single items are returned as |Speed|.
+
+        .. code-block:: python
 
-    def __mul__(self, other):
-        return Speed(float(self).__mul__(float(other)))
+            >>> from colimit import SpeedArray
+            >>> limits = SpeedArray([30., 50., 100.], 'kmh')
+            >>> limits.mph.round(3)
+            array([18.641, 31.069, 62.137])
+            >>> limits[1]
+            13.89 mps (50.00 km/h or 31.07 mph)
 
-    def __truediv__(self, other):
-        return Speed(float(self).__truediv__(float(other)))
+        """
+        if unit not in MPS:
+            raise ValueError('Speed unit must be of %s' % str(MPS))
+        speed = np.asarray(speed, dtype=float)
+        if not unit == 'mps':
+            speed = speed / MPS[unit]
+        return speed.view(cls)
+
+    @property
+    def mps(self):
+        """ speed values in `mps` """
+        return self.view(np.ndarray)
 
-    def __bool__(self):
-        return float(self).__bool__()
+    @property
+    def kmh(self):
+        """ speed values in `kmh` """
+        return self.view(np.ndarray) * MPS['kmh']
 
-    def __cmp__(self, other):
-        return float(self).__cmp__(float(other))
+    @property
+    def mph(self):
+        """ speed values in `mph` """
+        return self.view(np.ndarray) * MPS['mph']
 
-    def __eq__(self, other):
-        try:
-            return float(self).__eq__(float(other))
-        except ValueError:
-            return False
+    @property
+    def fts(self):
+        """ speed values in `fts` """
+        return self.view(np.ndarray) * MPS['fts']
 
-    def __hash__(self):
-        return hash(float(self))
+    @property
+    def knots(self):
+        """ speed values in `knots` """
+        return self.view(np.ndarray) * MPS['knots']
+
+    def __array_wrap__(self, obj, context=None, return_scalar=False):
+        if return_scalar:
+            return obj[()]
+        return obj.view(np.ndarray)
+
+    def __getitem__(self, item):
+        value = super().__getitem__(item)
+        if isinstance(value, np.ndarray):
+            return value
+        return Speed(float(value))
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+from array import array
+
+import numpy as np
+
+from .location import LocationArray
+from .speed import SpeedArray
+from .way import Way, _coordinate
+
+__all__ = 'WayTable',
+
+
+class WayTable(object):
+
+    def __init__(self, ways=()):
+        """ columns of many ways without an object per way or node
+
+        :param ways: sequence of |Way| or of dictionaries
+            of |Way| arguments (as given by |Connection().get_ways()|)
+
+        The table is built in a single pass over **ways**
+        and stores one :class:`numpy.ndarray` for each of
+
+            * way ids, limits and flags (*oneway*, *variable*, *conditional*)
+            * node ids, latitudes and longitudes of all ways one after another
+              with an array of **offsets** to the first node of each way
+              (node ids of 0 if not given)
+
+        Items of the table are |Way| objects built on demand.
+        They read their geometry from the table columns
+        (as |LocationArray|) and turn it into |Location| objects
+        only on first access of |Way().geometry|.
+
+        .. code-block:: python
+
+            >>> from colimit.table import WayTable
+            >>> table = WayTable([
+            ...     {'id': 1, 'nodes': [1, 2], 'limit': 50.,
+            ...      'geometry': [{'lat': 49.867, 'lon': 8.638},
+            ...                   {'lat': 49.868, 'lon': 8.638}]},
+            ...     {'id': 2, 'nodes': [2, 3], 'oneway': True,
+            ...      'geometry': [{'lat': 49.868, 'lon': 8.638},
+            ...                   {'lat': 49.868, 'lon': 8.640}]}])
+            >>> len(table), table.offsets.tolist()
+            (2, [0, 2, 4])
+            >>> table.limits.tolist()
+            [50.0, -1.0]
+            >>> table[1]
+            Way(2)
+            >>> table[1].nodes
+            (2, 3)
+
+        """
+        ids, limits = array('q'), array('d')
+        oneway, variable, conditional = array('b'), array('b'), array('b')
+        nodes, latitude, longitude = array('q'), array('d'), array('d')
+        offsets, tags = array('q', (0,)), list()
+        for way in ways:
+            if isinstance(way, Way):
+                ids.append(way.id)
+                limits.append(float(way.limit))
+                oneway.append(bool(way.oneway))
+                variable.append(bool(way.variable))
+                conditional.append(bool(way.conditional))
+                tags.append(way.tags)
+                coordinates = way.coordinates
+                latitude.extend(coordinates[:, 0].tolist())
+                longitude.extend(coordinates[:, 1].tolist())
+                node_ids = way.nodes
+                n = len(coordinates)
+            else:
+                ids.append(way.get('id', 0))
+                limit = way.get('limit')
+                limits.append(float(
+                    way.get('maxspeed', -1.0) if limit is None else limit))
+                oneway.append(bool(way.get('oneway', False)))
+                variable.append(bool(way.get('variable', False)))
+                conditional.append(bool(way.get('conditional', False)))
+                tags.append(way.get('tags') or dict())
+                geometry = way.get('geometry') or way.get('locations') or ()
+                coordinates = [_coordinate(g) for g in geometry]
+                latitude.extend(c[0] for c in coordinates)
+                longitude.extend(c[1] for c in coordinates)
+                node_ids = way.get('nodes', ())
+                n = len(geometry)
+            if len(node_ids) == n:
+                nodes.extend(node_ids)
+            else:
+                nodes.extend((0,) * n)
+            offsets.append(offsets[-1] + n)
+
+        self._ids = np.frombuffer(ids, dtype=np.int64)
+        self._limits = np.frombuffer(limits, dtype=np.float64)
+        self._oneway = np.frombuffer(oneway, dtype=np.int8).astype(bool)
+        self._variable = np.frombuffer(variable, dtype=np.int8).astype(bool)
+        self._conditional = \
+            np.frombuffer(conditional, dtype=np.int8).astype(bool)
+        self._nodes = np.frombuffer(nodes, dtype=np.int64)
+        self._latitude = np.frombuffer(latitude, dtype=np.float64)
+        self._longitude = np.frombuffer(longitude, dtype=np.float64)
+        self._offsets = np.frombuffer(offsets, dtype=np.int64)
+        self._tags = tags
+
+    @property
+    def ids(self):
+        """ way identifiers """
+        return self._ids
+
+    @property
+    def limits(self):
+        """ speed limits (as |SpeedArray|)
+            with -1 as no limit information and 0 as no limit """
+        return self._limits.view(SpeedArray)
+
+    @property
+    def oneway(self):
+        """ `True` for oneway ways """
+        return self._oneway
+
+    @property
+    def variable(self):
+        """ `True` for ways with variable limits """
+        return self._variable
+
+    @property
+    def conditional(self):
+        """ `True` for ways with conditional limits """
+        return self._conditional
+
+    @property
+    def offsets(self):
+        """ position of first node of each way in node columns
+            (with total number of nodes as last item) """
+        return self._offsets
+
+    @property
+    def nodes(self):
+        """ node ids of all ways """
+        return self._nodes
+
+    @property
+    def latitude(self):
+        """ latitudes of all nodes """
+        return self._latitude
+
+    @property
+    def longitude(self):
+        """ longitudes of all nodes """
+        return self._longitude
+
+    @property
+    def bounds(self):
+        """ south, west, north and east bounds of each way
+            as :class:`numpy.ndarray` of shape (n, 4)
+
+        Ways without geometry have bounds of `nan`.
+        """
+        start, stop = self._offsets[:-1], self._offsets[1:]
+        full = start < stop
+        bounds = np.full((len(self), 4), np.nan)
+        if full.any():
+            # nodes of ways with geometry are consecutive groups
+            for k, (column, reduce) in enumerate((
+                    (self._latitude, np.minimum),
+                    (self._longitude, np.minimum),
+                    (self._latitude, np.maximum),
+                    (self._longitude, np.maximum))):
+                bounds[full, k] = reduce.reduceat(column, start[full])
+        return bounds
+
+    @property
+    def ways(self):
+        """ all ways as :class:`tuple` (|Way|) """
+        return tuple(self)
+
+    def _way(self, i):
+        a, b = self._offsets[i], self._offsets[i + 1]
+        nodes = self._nodes[a:b]
+        geometry = LocationArray(latitude=self._latitude[a:b],
+                                 longitude=self._longitude[a:b],
+                                 id=nodes)
+        return Way(id=int(self._ids[i]),
+                   nodes=nodes.tolist() if nodes.any() else (),
+                   geometry=geometry,
+                   oneway=bool(self._oneway[i]),
+                   limit=float(self._limits[i]),
+                   variable=bool(self._variable[i]),
+                   conditional=bool(self._conditional[i]),
+                   tags=self._tags[i])
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            if item < 0:
+                item += len(self)
+            if not 0 <= item < len(self):
+                raise IndexError('way index out of range')
+            return self._way(item)
+        return tuple(self._way(i) for i in range(len(self))[item])
+
+    def __iter__(self):
+        return (self._way(i) for i in range(len(self)))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __repr__(self):
+        return "%s(%d)" % (self.__class__.__name__, len(self))
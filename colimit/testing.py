@@ -314,7 +314,7 @@ def gpx(gpx_file, wpt=False, time_step=1):
 
 
 def test(locations, get_ways, get_limit_file, get_limit_file_2=None,
-         tester=None, cache=dict(), folder='data'):
+         tester=None, cache=None, folder='data', way_cache=None):
     """ test function to test or compare `get_limit` codes
 
     :param locations: list of locations
@@ -343,9 +343,21 @@ def test(locations, get_ways, get_limit_file, get_limit_file_2=None,
             * **timing** is the execution time of first `get_limit`
             * **timing_2** is the execution time of second `get_limit` or 0.0
 
+    :param cache: passed on with each `get_limit` call
+        but not given to **get_ways**, i.e. without effect
+        and kept for compatibility (optional,
+        to cache results of **get_ways** use **way_cache**)
+    :param folder: passed on with each `get_limit` call
+        but not given to **get_ways**, i.e. without effect
+        and kept for compatibility (optional)
+    :param way_cache: |WayCache| to cache results of **get_ways**
+        given to the `get_limit` functions (optional)
+
     """
     if tester is None:
         tester = (lambda *x: print(*x))
+    if way_cache is not None:
+        get_ways = way_cache(get_ways)
 
     # build testing `get_limit`
     get_limit = _import(get_limit_file)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+# colimit
+# -------
+# better know your limits
+#
+# Author:   sonntagsgesicht
+# Version:  0.1.12, copyright Tuesday, 29 March 2022
+# Website:  https://sonntagsgesicht.github.com/colimit
+# License:  No License - only for h_da staff or students (see LICENSE file)
+
+
+from math import asinh, atan, degrees, floor, pi, radians, sinh, tan
+
+import numpy as np
+
+from .geometry import LocalFrame
+
+__all__ = 'ZOOM', 'tile', 'tile_bounds', 'tiles', 'intersects', 'around'
+
+ZOOM = 15
+MAX_LATITUDE = 85.0511287798
+
+
+def tile(latitude, longitude, zoom=ZOOM):
+    """ slippy map tile containing a coordinate
+
+    :param latitude: latitude in degrees
+    :param longitude: longitude in degrees
+    :param zoom: zoom level of the tile grid (optional, default 15)
+    :return: (**x**, **y**) as :class:`int`
+
+    The grid of tiles is the common web mercator grid
+    with 2 to the power of **zoom** tiles along each axis
+    as used by OpenStreetMap.
+    At zoom level 15 tiles are about 800 meters wide
+    in central Europe.
+
+    .. code-block:: python
+
+        >>> from colimit.tiles import tile, tile_bounds
+        >>> tile(49.8670, 8.6380)
+        (17170, 11131)
+        >>> tuple(round(b, 4) for b in tile_bounds(17170, 11131))
+        (49.8663, 8.6353, 49.8734, 8.6462)
+
+    """
+    n = 2 ** zoom
+    lat = radians(max(-MAX_LATITUDE, min(latitude, MAX_LATITUDE)))
+    x = floor((longitude + 180.) / 360. * n)
+    y = floor((1. - asinh(tan(lat)) / pi) / 2. * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(x, y, zoom=ZOOM):
+    """ south, west, north and east bounds of a slippy map tile
+
+    :param x: tile column
+    :param y: tile row
+    :param zoom: zoom level of the tile grid (optional, default 15)
+    :return: (**south**, **west**, **north**, **east**)
+        as :class:`float` in degrees
+    """
+    n = 2 ** zoom
+    north = degrees(atan(sinh(pi * (1. - 2. * y / n))))
+    south = degrees(atan(sinh(pi * (1. - 2. * (y + 1) / n))))
+    west = x / n * 360. - 180.
+    east = (x + 1) / n * 360. - 180.
+    return south, west, north, east
+
+
+def tiles(south, west, north, east, zoom=ZOOM):
+    """ slippy map tiles covering bounds
+
+    :param south: in degrees
+    :param west: in degrees
+    :param north: in degrees
+    :param east: in degrees
+    :param zoom: zoom level of the tile grid (optional, default 15)
+    :return: :class:`tuple` of (**x**, **y**)
+    """
+    x0, y0 = tile(north, west, zoom)
+    x1, y1 = tile(south, east, zoom)
+    return tuple((x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+
+
+def intersects(bounds, south, west, north, east):
+    """ bounds intersecting given bounds
+
+    :param bounds: :class:`numpy.ndarray` of shape (n, 4)
+        with **south**, **west**, **north** and **east** in each row
+        (as given by |WayTable().bounds|)
+    :param south: in degrees
+    :param west: in degrees
+    :param north: in degrees
+    :param east: in degrees
+    :return: :class:`numpy.ndarray` of :class:`bool`
+        (`False` for bounds of `nan`)
+    """
+    s, w, n, e = np.asarray(bounds, dtype=np.float64).reshape(-1, 4).T
+    return (s <= north) & (south <= n) & (w <= east) & (west <= e)
+
+
+def around(latitude, longitude, radius=0.0):
+    """ south, west, north and east bounds of a circle
+
+    :param latitude: center latitude in degrees
+    :param longitude: center longitude in degrees
+    :param radius: radius in meters (optional, default 0.0)
+    :return: (**south**, **west**, **north**, **east**)
+        as :class:`float` in degrees
+
+    The bounds reach **radius** meters
+    to the south, west, north and east of the center
+    (in the |LocalFrame| at the center),
+    so they cover the whole circle.
+
+    .. code-block:: python
+
+        >>> from colimit import Location
+        >>> from colimit.tiles import around
+        >>> center = Location(49.8670, 8.6380)
+        >>> south, west, north, east = around(*center.coordinate, 100.)
+        >>> round(center.dist(Location(north, 8.6380), 'haversine'), 1)
+        100.0
+        >>> round(center.dist(Location(49.8670, east), 'haversine'), 1)
+        100.0
+
+    """
+    frame = LocalFrame((latitude, longitude))
+    south, west = frame.to_latlon(-radius, -radius)
+    north, east = frame.to_latlon(radius, radius)
+    return south, west, north, east
@@ -11,11 +11,31 @@
 
 
 import datetime
+import hashlib
 
-from .location import Location
+import numpy as np
+
+from .geometry import LocalFrame
+from .location import Location, LocationArray
 from .speed import Speed
 
 
+def _coordinate(item):
+    # latitude and longitude as given to Location(**item)
+    if isinstance(item, Location):
+        return item.coordinate
+    latitude = item.get('latitude') or item.get('lat', 0.0)
+    longitude = item.get('longitude') or item.get('lon', 0.0)
+    return latitude, longitude
+
+
+def _node_id(item):
+    # node id as given to Location(**item)
+    if isinstance(item, Location):
+        return item.id
+    return item.get('id', 0)
+
+
 class Way(object):
 
     def __init__(self,
@@ -35,6 +55,7 @@ class Way(object):
         :param id: way identifier
         :param nodes: list of location identifier (node id)
         :param geometry: list of |Location| (matching _node_ list)
+            or |LocationArray|
         :param oneway: :class:`bool` if way is oneway
         :param limit: speed limit value as |Speed| with
 
@@ -50,17 +71,19 @@ class Way(object):
         :param kwargs: additional or alternative arguments,
                 e.g. _locations_ for _geometry_ or _maxspeed_ for _limit_.
         """
-        nodes = tuple(int(n) for n in nodes)
         if locations and geometry:
             raise ValueError("must use either locations or geometry argument")
-        geometry = geometry or locations
-        geometry = tuple(
-            g if isinstance(g, Location) else Location(**g) for g in geometry)
-        if geometry and nodes:
-            self._validate_geometry(nodes, geometry)
         self._id = id
-        self._nodes = nodes
-        self._geometry = geometry
+        self._nodes = tuple(int(n) for n in nodes)
+        # geometry items are kept as given and turned into locations
+        # (as well as segments) on first access
+        geometry = geometry or locations
+        if not isinstance(geometry, LocationArray):
+            geometry = tuple(geometry)
+        if geometry and self._nodes:
+            self._validate_geometry(self._nodes, geometry)
+        self._raw = geometry
+        self._geometry = None
         self._tags = tags or dict()
         self._oneway = oneway
         if limit is None:
@@ -68,36 +91,78 @@ class Way(object):
         self._limit = Speed(float(limit))
         self._variable = variable
         self._conditional = conditional
-        self._boundary = ()
-        self._segments = tuple(s.diff(e, timedelta=1)
-                               for s, e in zip(geometry[:-1], geometry[1:]))
+        self._bounds = None
+        self._segments = None
+        self._coordinates = None
+        self._distances = None
+        self._length = None
+        self._digest = None
+        self._significance = None
+        self._simplified = dict()
+        self._frame = None
 
     @staticmethod
     def _validate_geometry(nodes, geometry):
-        # value must be list of Coordinates objects
+        # value must be list of Coordinates objects (or of dicts)
         # in same order as self.node dicts
-        for n, g in zip(nodes, geometry):
-            if g.id and not int(n) == g.id:
+        if isinstance(geometry, LocationArray):
+            k = min(len(nodes), len(geometry))
+            ids, nodes = geometry.id[:k], np.asarray(nodes[:k])
+            if np.any((ids != 0) & (ids != nodes)):
+                raise ValueError('Geometries must meet order of nodes')
+            return
+        for n, i in zip(nodes, (_node_id(g) for g in geometry)):
+            if i and not int(n) == int(i):
                 raise ValueError('Geometries must meet order of nodes')
 
     @property
     def geometry(self):
-        """ geometry as a list of locations """
+        """ geometry as a list of locations
+
+        Geometry items given as dictionaries are turned
+        into |Location| objects on first access.
+        """
+        if self._geometry is None:
+            # nodes are validated against raw items on instantiation
+            self._geometry = tuple(
+                g if isinstance(g, Location) else Location(**g)
+                for g in self._raw)
+            self._raw = ()
         return self._geometry
 
     @geometry.setter
     def geometry(self, value):
         # geometry can only be set once
-        if self._geometry:
+        if self._raw or self._geometry:
             raise ValueError('Geometries can only be set once.')
         # validate geometries
         self._validate_geometry(self._nodes, value)
-        self._geometry = value
-        self._segments = tuple(s.diff(e, timedelta=1)
-                               for s, e in zip(value[:-1], value[1:]))
+        self._geometry = tuple(value)
+        self._bounds = None
+        self._segments = None
+        self._coordinates = None
+        self._distances = None
+        self._length = None
+        self._digest = None
+        self._significance = None
+        self._simplified = dict()
+        self._frame = None
+
+    @property
+    def _local_frame(self):
+        # frame at the first node reused for all calculations of the way
+        if self._frame is None:
+            self._frame = LocalFrame(tuple(self.coordinates[0]))
+        return self._frame
 
     @property
     def segments(self):
+        """ segments between consecutive nodes as |Location| differences """
+        if self._segments is None:
+            geometry = self.geometry
+            self._segments = tuple(
+                s.diff(e, timedelta=1)
+                for s, e in zip(geometry[:-1], geometry[1:]))
         return self._segments
 
     @property
@@ -110,6 +175,11 @@ class Way(object):
         """ nodes as a list of location identifier """
         return self._nodes
 
+    @property
+    def tags(self):
+        """ dictionary of tags """
+        return self._tags
+
     @property
     def limit(self):
         """ speed limit with -1 as no limit information and 0 as no limit """
@@ -130,37 +200,111 @@ class Way(object):
         """ True if _limit_ is conditional, i.e depends on time or weather """
         return self._conditional
 
+    @property
+    def coordinates(self):
+        """ latitude and longitude of nodes as :class:`numpy.ndarray`
+
+        The contiguous float64 array of shape (n, 2) is built once
+        (without turning geometry items given as dictionaries
+        into |Location| objects).
+        """
+        if self._coordinates is None:
+            if isinstance(self._raw, LocationArray):
+                items = np.column_stack(self._raw.coordinate)
+            elif self._geometry is None:
+                items = tuple(_coordinate(g) for g in self._raw)
+            else:
+                items = tuple(g.coordinate for g in self._geometry)
+            self._coordinates = \
+                np.array(items, dtype=np.float64).reshape(-1, 2)
+        return self._coordinates
+
+    @property
+    def distances(self):
+        """ cumulative distance in meters from first node to each node
+
+        Distances are calculated at once in the |LocalFrame|
+        at the first node, i.e. in the same metric as |Way().project()|,
+        and cached as :class:`numpy.ndarray`.
+        They are the measures of the nodes
+        for |Way().locate()| and |Way().interpolate()|.
+        """
+        if self._distances is None:
+            if not len(self):
+                self._distances = np.zeros(1)
+                return self._distances
+            x, y = self._local_frame.to_xy(*self.coordinates.T)
+            dist = np.hypot(np.diff(x), np.diff(y))
+            self._distances = np.concatenate(((0.0,), np.cumsum(dist)))
+        return self._distances
+
+    @property
+    def digest(self):
+        """ content digest of way as hex string
+
+        The digest covers |Way().id|, |Way().oneway|, |Way().variable|,
+        |Way().conditional|, |Way().limit|, |Way().tags|, |Way().nodes|
+        and |Way().coordinates|.
+        It is computed once and used for equality and hashing of ways.
+        """
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr((self._id, bool(self._oneway), bool(self._variable),
+                           bool(self._conditional), float(self._limit),
+                           sorted(self._tags.items()))
+                          ).encode())
+            h.update(np.asarray(self._nodes, dtype=np.int64).tobytes())
+            h.update(self.coordinates.tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    @property
+    def bounds(self):
+        """ south, west, north and east bounds of way """
+        if self._bounds is None and len(self):
+            south, west = self.coordinates.min(axis=0)
+            north, east = self.coordinates.max(axis=0)
+            self._bounds = float(south), float(west), float(north), float(east)
+        return self._bounds
+
     @property
     def boundary(self):
         """ bounding locations south/west and north/east """
-        if not self._boundary:
-            self._boundary = Location.boundary(*self.geometry)
-        return self._boundary
+        if self.bounds:
+            south, west, north, east = self.bounds
+            return Location(south, west), Location(north, east)
 
     @property
     def center(self):
         """ center location of bounding box """
-        return Location.center(*self._boundary)
+        return Location.center(bounds=self.bounds)
 
     @property
     def diameter(self):
         """ south-to-north and west-to-east diameter of bounding box """
-        return Location.diameter(*self.boundary)
+        return Location.diameter(bounds=self.bounds)
 
     @property
     def length(self):
-        """ length of way """
-        length = 0.0
-        for s, e in zip(self.geometry[:-1], self.geometry[1:]):
-            length += s.dist(e)
-        return length
+        """ length of way
+
+        The length is the last of |Way().distances|,
+        i.e. the sum of the distances between consecutive nodes
+        in the |LocalFrame| at the first node.
+        It is computed once and cached.
+        """
+        if self._length is None:
+            self._length = float(self.distances[-1])
+        return self._length
 
     @property
     def duration(self):
-        duration = datetime.timedelta()
-        for s, e in zip(self.geometry[:-1], self.geometry[1:]):
-            duration += e.time - s.time
-        return duration
+        """ time between first and last node """
+        if len(self) < 2:
+            return datetime.timedelta()
+        # consecutive time differences add up to this
+        start = self.geometry[0].time
+        return self.geometry[-1].time - start
 
     @property
     def avg_speed(self):
@@ -168,6 +312,255 @@ class Way(object):
             return Speed(self.length / self.duration.total_seconds())
         return 0.0
 
+    @property
+    def significance(self):
+        """ significance of nodes for the shape of the way in meters
+
+        The significance of a node is the distance
+        at which the `Douglas-Peucker algorithm
+        <https://en.wikipedia.org/wiki/Ramer-Douglas-Peucker_algorithm>`_
+        keeps this node, i.e. the node is kept by |Way().simplify()|
+        if its significance exceeds the tolerance.
+        First and last node are always kept.
+
+        Significances are calculated once in a |LocalFrame|
+        at the first node and cached as :class:`numpy.ndarray`.
+        """
+        if self._significance is None:
+            n = len(self)
+            significance = np.zeros(n)
+            significance[[0, -1] if n else []] = np.inf
+            if 2 < n:
+                x, y = self._local_frame.to_xy(*self.coordinates.T)
+                stack = [(0, n - 1, np.inf)]
+                while stack:
+                    a, b, parent = stack.pop()
+                    if b - a < 2:
+                        continue
+                    dx, dy = x[b] - x[a], y[b] - y[a]
+                    px, py = x[a + 1:b] - x[a], y[a + 1:b] - y[a]
+                    dd = dx * dx + dy * dy
+                    t = np.clip((px * dx + py * dy) / dd, 0., 1.) if dd else 0.
+                    dist = np.hypot(px - t * dx, py - t * dy)
+                    i = a + 1 + int(np.argmax(dist))
+                    # a node is not more significant than its parent
+                    d = min(float(dist[i - a - 1]), parent)
+                    significance[i] = d
+                    stack.append((a, i, d))
+                    stack.append((i, b, d))
+            self._significance = significance
+        return self._significance
+
+    def simplify(self, tolerance=1.0):
+        """ way with nodes kept by the Douglas-Peucker algorithm
+
+        :param tolerance: maximal distance in meters
+            of dropped nodes to the simplified way (optional, default 1.0)
+        :return: |Way|
+
+        The simplified way keeps id, flags, limit and tags
+        as well as the node ids of the kept nodes.
+        Each level of detail, i.e. **tolerance**, is cached,
+        so scoring can run on a coarse level first and
+        refine with the full geometry only for top candidates.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> start = Location(latitude=49.8670, longitude=8.6380)
+            >>> locations = [start.next(i * 10., 90.).next(i % 2 * .5, 0.)
+            ...              for i in range(11)]
+            >>> way = Way(nodes=range(1, 12), geometry=locations)
+            >>> len(way.simplify(0.1)), len(way.simplify(1.))
+            (11, 2)
+            >>> way.simplify(1.).nodes
+            (1, 11)
+
+        """
+        if tolerance not in self._simplified:
+            keep = np.flatnonzero(tolerance < self.significance)
+            if len(keep) == len(self):
+                way = self
+            else:
+                items = self._raw if self._geometry is None \
+                    else self._geometry
+                nodes = self._nodes
+                if len(nodes) == len(self):
+                    nodes = tuple(nodes[i] for i in keep)
+                way = self.__class__(id=self._id,
+                                     nodes=nodes,
+                                     geometry=tuple(items[i] for i in keep),
+                                     oneway=self._oneway,
+                                     limit=float(self._limit),
+                                     variable=self._variable,
+                                     conditional=self._conditional,
+                                     tags=self._tags)
+                way._coordinates = self.coordinates[keep]
+            self._simplified[tolerance] = way
+        return self._simplified[tolerance]
+
+    def project(self, location, frame=None):
+        """ projects locations onto the nearest segment of the way
+
+        :param location: |Location| or |LocationArray| to project
+        :param frame: |LocalFrame| to run the projection in
+            (optional, default is a frame at the first way node)
+        :return: tuple (**index**, **offset**, **distance**, **speed**)
+            with
+
+                * **index** of the nearest segment in |Way().segments|
+                * **offset** along this segment in meters
+                  from its start node to the projected point
+                  (in the metric of |Way().distances|,
+                  so the measure of the projected point is
+                  the distance of the segment start plus **offset**)
+                * **distance** in meters from the location
+                  to the projected point (in **frame** coordinates)
+                * **speed** projected onto the direction of the segment
+                  (negative if moving against the way direction)
+
+            as scalars for a |Location|
+            or as :class:`numpy.ndarray` for a |LocationArray|.
+
+        All locations are projected onto all segments at once.
+        Projected points are forced to fall into their segment,
+        i.e. onto the segment's start or end node if
+        the perpendicular foot falls outside.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> c = Location(latitude=49.8680, longitude=8.6400)
+            >>> way = Way(geometry=(a, b, c))
+            >>> loc = Location(latitude=49.8685, longitude=8.6390)
+            >>> index, offset, distance, speed = way.project(loc)
+            >>> int(index), round(offset, 3), round(distance, 3)
+            (1, 71.753, 55.66)
+
+        """
+        scalar, index, t, _, distance, drc = self._project(location, frame)
+        speed = np.asarray(location.speed, dtype=float) * \
+            np.cos(np.radians(location.direction - drc))
+        distances = self.distances
+        end = np.minimum(index + 1, len(distances) - 1)
+        offset = t * (distances[end] - distances[index])
+        if scalar:
+            return int(index[0]), float(offset[0]), float(distance[0]), \
+                float(speed[0])
+        return index, offset, distance, speed
+
+    def _project(self, location, frame=None):
+        # nearest segment index, its fraction, length and direction
+        # as well as distance to location in frame coordinates
+        if not len(self):
+            raise ValueError('Cannot project onto way without geometry.')
+        if frame is None:
+            frame = self._local_frame
+        x0, y0, x1, y1 = frame.segments(self)
+        if not len(x0):
+            x0, y0 = frame.to_xy(*self.coordinates[0])
+            x0, y0 = x1, y1 = np.array([x0]), np.array([y0])
+
+        lx, ly = frame.xy(location)
+        scalar = not np.ndim(lx)
+        lx, ly = np.atleast_1d(lx)[:, None], np.atleast_1d(ly)[:, None]
+        dx, dy = x1 - x0, y1 - y0
+        dd = dx * dx + dy * dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((lx - x0) * dx + (ly - y0) * dy) / dd
+        t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+        dist = np.hypot(lx - (x0 + t * dx), ly - (y0 + t * dy))
+
+        index = np.argmin(dist, axis=1)
+        rows = np.arange(len(index))
+        drc = np.degrees(np.arctan2(dx[index], dy[index]))
+        return scalar, index, t[rows, index], np.sqrt(dd[index]), \
+            dist[rows, index], drc
+
+    def locate(self, location, frame=None):
+        """ measure along the way of the nearest point to locations
+
+        :param location: |Location| or |LocationArray| to locate
+        :param frame: |LocalFrame| to run the projection in
+            (see |Way().project()|)
+        :return: distance in meters from the first node
+            along the way to the projected point
+            as :class:`float` for a |Location|
+            or as :class:`numpy.ndarray` for a |LocationArray|
+
+        Locations are projected onto the nearest segment by
+        |Way().project()| and the measure is interpolated between
+        the cumulative |Way().distances| of its start and end node.
+        So |Way().interpolate()| inverts |Way().locate()|.
+
+        .. code-block:: python
+
+            >>> from colimit import Location, Way
+            >>> a = Location(latitude=49.8670, longitude=8.6380)
+            >>> b = Location(latitude=49.8680, longitude=8.6380)
+            >>> c = Location(latitude=49.8680, longitude=8.6400)
+            >>> way = Way(geometry=(a, b, c))
+            >>> loc = Location(latitude=49.8685, longitude=8.6390)
+            >>> round(way.locate(loc), 3)
+            183.072
+            >>> index, offset, _, _ = way.project(loc)
+            >>> round(float(way.distances[index] + offset), 3)
+            183.072
+            >>> point = way.interpolate(way.locate(loc))
+            >>> round(point.latitude, 6), round(point.longitude, 6)
+            (49.868, 8.639)
+
+        """
+        scalar, index, t, _, _, _ = self._project(location, frame)
+        distances = self.distances
+        end = np.minimum(index + 1, len(distances) - 1)
+        measure = distances[index] + t * (distances[end] - distances[index])
+        if scalar:
+            return float(measure[0])
+        return measure
+
+    def interpolate(self, measure):
+        """ location at a given measure along the way
+
+        :param measure: distance in meters from the first node along
+            the way as :class:`float` (or sequence of)
+        :return: |Location| for a single **measure**
+            or |LocationArray| for many
+            with **direction** of the segment found
+            (in the |LocalFrame| of |Way().project()|)
+
+        The segment is found by bisection of the cumulative
+        |Way().distances|, i.e. in logarithmic time of the number of nodes.
+        Measures outside the way are moved onto the first or last node.
+        """
+        if not len(self):
+            raise ValueError('Cannot interpolate on way without geometry.')
+        scalar = not np.ndim(measure)
+        distances, coordinates = self.distances, self.coordinates
+        last = max(len(distances) - 2, 0)
+        measure = np.clip(np.atleast_1d(measure), 0.0, distances[-1])
+        index = np.searchsorted(distances, measure, side='right') - 1
+        index = np.clip(index, 0, last)
+        end = np.minimum(index + 1, len(distances) - 1)
+        length = distances[end] - distances[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (measure - distances[index]) / length
+        t = np.where(0.0 < length, t, 0.0)
+        start, stop = coordinates[index], coordinates[end]
+        latitude, longitude = (start + t[:, None] * (stop - start)).T
+        # direction in the same frame as Way().project()
+        x0, y0, x1, y1 = self._local_frame.segments(self)
+        direction = np.zeros(len(index))
+        if len(x0):
+            dx, dy = x1[index] - x0[index], y1[index] - y0[index]
+            direction = np.degrees(np.arctan2(dx, dy)) % 360.0
+        if scalar:
+            return Location(float(latitude[0]), float(longitude[0]),
+                            direction=float(direction[0]))
+        return LocationArray(latitude, longitude, direction=direction)
+
     @property
     def _dict(self):
         # assert kwargs == Way(**kwargs)._dict()
@@ -198,9 +591,11 @@ class Way(object):
         if isinstance(item, (tuple, list)):
             return any(i in self for i in item)
         if isinstance(item, Location):
-            sw, ne = self.boundary
-            return sw.latitude <= item.latitude <= ne.latitude \
-                and sw.longitude <= item.longitude <= ne.longitude
+            if not len(self):
+                return False
+            south, west, north, east = self.bounds
+            return south <= item.latitude <= north \
+                and west <= item.longitude <= east
         return False
 
     def __str__(self):
@@ -222,13 +617,19 @@ class Way(object):
         return "Way(%d)" % self._id
 
     def __eq__(self, other):
-        return self.json == other.json
+        if not isinstance(other, Way):
+            return NotImplemented
+        if self is other:
+            return True
+        return self._id == other.id and self.digest == other.digest
 
     def __hash__(self):
-        return hash(str(self.json))
+        return hash((self._id, self.digest))
 
     def __getitem__(self, item):
-        return self._geometry.__getitem__(item)
+        return self.geometry.__getitem__(item)
 
     def __len__(self):
+        if self._geometry is None:
+            return len(self._raw)
         return len(self._geometry)
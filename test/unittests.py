@@ -10,17 +10,33 @@
 # License:  No License - only for h_da staff or students (see LICENSE file)
 
 
+import asyncio
 import os
 import sys
+import tempfile
+import threading
 import unittest
 import logging
 import datetime
+import gc
+import time
+
+import numpy as np
 
 sys.path.append('..')
 
 pkg = __import__(os.getcwd().split(os.sep)[-1])
-from colimit import Speed, Location, Way, Connection, gpx, test
+from colimit import Speed, SpeedArray, Location, LocationArray, \
+    LocalFrame, Way, WayRegistry, WayCache, WayTable, Connection, \
+    AsyncConnection, gpx, test
+from colimit.codec import dumps, loads, dump, load
+from colimit.geometry import GEOMETRIES, get_geometry
+from colimit.graph import WayGraph
+from colimit.index import WayIndex, SegmentIndex
+from colimit.limits import LimitsServerError
+from colimit.server import LimitsServer
 from colimit.testing import _Tester, _import
+from colimit.tiles import around
 
 logging.basicConfig()
 
@@ -107,6 +123,40 @@ class FirstUnitTests(unittest.TestCase):
         self.assertAlmostEqual(float(Speed(value, 'fts').fts), value)
         self.assertAlmostEqual(float(Speed(value, 'knots').knots), value)
 
+        self.assertTrue(isinstance(spd, float))
+        self.assertEqual(value, spd)
+        self.assertEqual(hash(value), hash(spd))
+        self.assertIs(float, type(spd + spd))
+        self.assertEqual(2 * value, spd + spd)
+        self.assertRaises(ValueError, Speed, '1.0')
+        self.assertRaises(ValueError, Speed, 1.0, 'mps2')
+        self.assertEqual('no information', str(Speed(-1)))
+
+        loc = Location(speed=value)
+        self.assertIs(loc.speed, loc.speed)
+        self.assertIs(Speed, type(loc.speed))
+        self.assertIs(Speed, type(loc.clone(speed=value).speed))
+
+    def test_speed_array(self):
+        values = [float(self.speed) * i for i in range(10)]
+        arr = SpeedArray(values)
+        for unit in ('mps', 'kmh', 'mph', 'fts', 'knots'):
+            converted = getattr(arr, unit)
+            self.assertIs(np.ndarray, type(converted))
+            for v, c in zip(values, converted):
+                self.assertAlmostEqual(getattr(Speed(v), unit), c)
+            other = SpeedArray(converted, unit)
+            for v, c in zip(values, other):
+                self.assertAlmostEqual(v, c)
+        self.assertIs(Speed, type(arr[3]))
+        self.assertIs(SpeedArray, type(arr[3:]))
+        self.assertIs(np.ndarray, type(arr + arr))
+        self.assertRaises(ValueError, SpeedArray, values, 'mps2')
+
+        locations = LocationArray.from_locations(*self.locations)
+        self.assertIs(SpeedArray, type(locations.speed))
+        self.assertAlmostEqual(self.speed.kmh, locations.speed.kmh[0])
+
     def test_xy(self):
         c, cc = 0, 0
         xy = (1, 1), (1, -1), (-1, -1), (-1, 1)
@@ -122,6 +172,95 @@ class FirstUnitTests(unittest.TestCase):
             self.assertAlmostEqual(r, s)
             self.assertAlmostEqual(d, e)
 
+    def test_geometry(self):
+        ref = self.location.next(radius=1234., direction=56.)
+        for name, geometry in GEOMETRIES.items():
+            self.assertIs(geometry, get_geometry(name))
+            a, b = geometry.xy(*self.location.coordinate, 1234., 56.)
+            r, d = geometry.polar(*self.location.coordinate, a, b)
+            self.assertAlmostEqual(1234., r)
+            self.assertAlmostEqual(56., d)
+
+            a, b = geometry.xy_array(*self.location.coordinate,
+                                     [1234.], [56.])
+            self.assertAlmostEqual(a[0], geometry.xy(
+                *self.location.coordinate, 1234., 56.)[0])
+            r, d = geometry.polar_array(*self.location.coordinate, a, b)
+            self.assertAlmostEqual(1234., r[0])
+            self.assertAlmostEqual(56., d[0])
+
+            loc = self.location.next(1234., 56., geometry=name)
+            self.assertAlmostEqual(1234., self.location.dist(loc, name))
+            self.assertAlmostEqual(56., self.location.dir(loc, name))
+        self.assertRaises(ValueError, get_geometry, 'flat')
+
+        class HaversineLocation(Location):
+            geometry = 'haversine'
+
+        loc = HaversineLocation(*self.location.coordinate)
+        self.assertAlmostEqual(self.location.dist(ref, 'haversine'),
+                               loc.dist(ref))
+        self.assertNotAlmostEqual(self.location.dist(ref), loc.dist(ref))
+
+        arr = LocationArray.from_locations(*self.locations)
+        for d, g in zip(arr.dist(ref, 'haversine'), self.locations):
+            self.assertAlmostEqual(g.dist(ref, 'haversine'), d)
+
+    def test_local_frame(self):
+        frame = LocalFrame(self.location)
+        self.assertEqual((0.0, 0.0), frame.xy(self.location))
+        for loc in self.locations:
+            self.assertAlmostEqual(loc.coordinate[0],
+                                   frame.to_latlon(*frame.xy(loc))[0])
+            self.assertAlmostEqual(loc.coordinate[1],
+                                   frame.to_latlon(*frame.xy(loc))[1])
+            self.assertAlmostEqual(loc.dist(self.location, 'haversine'),
+                                   frame.dist(self.location, loc), places=2)
+            if loc.dist(self.location):
+                self.assertAlmostEqual(loc.dir(self.location, 'haversine'),
+                                       frame.dir(loc, self.location),
+                                       places=2)
+
+        # error against great circle distances grows quadratically
+        for d, error in (100., 0.001), (1000., 0.05), (5000., 1.):
+            for h in range(0, 360, 15):
+                loc = self.location.next(d, h, geometry='haversine')
+                self.assertGreater(
+                    error, abs(d - frame.dist(self.location, loc)))
+
+        # segments are cached as long as the way exists
+        way = Way(geometry=self.locations)
+        self.assertIs(frame.segments(way), frame.segments(way))
+        self.assertEqual(1, len(frame._segments))
+        del way
+        gc.collect()
+        self.assertEqual(0, len(frame._segments))
+
+        arr = LocationArray.from_locations(*self.locations)
+        for d, loc in zip(frame.dist(self.location, arr), self.locations):
+            self.assertAlmostEqual(frame.dist(self.location, loc), d)
+
+        a = self.location.next(100., 120., geometry='equirectangular')
+        b = a.next(100., 20., geometry='equirectangular')
+        p = self.location.project(a, b, frame=frame)
+        self.assertAlmostEqual(20., p.direction, places=3)
+        self.assertAlmostEqual(0., p.dist(p.project(a, b, frame=frame)))
+        p = self.location.project(a, b, segment=True, frame=frame)
+        self.assertNotEqual(a.coordinate, p.coordinate)
+        c = a.next(100., 120., geometry='equirectangular')
+        p = self.location.project(a, c, segment=True, frame=frame)
+        self.assertEqual(a.coordinate, p.coordinate)
+
+        way = Way(geometry=self.locations)
+        x0, y0, x1, y1 = frame.segments(way)
+        self.assertEqual(len(way) - 1, len(x0))
+        length = sum(s.dist(e, 'haversine')
+                     for s, e in zip(way[:-1], way[1:]))
+        self.assertAlmostEqual(length,
+                               sum(((x1 - x0) ** 2 + (y1 - y0) ** 2) ** .5),
+                               places=2)
+        self.assertIs(x0, frame.segments(way)[0])
+
     def test_location(self):
         loc = self.location
         self.assertTrue(isinstance(str(loc), str))
@@ -169,6 +308,187 @@ class FirstUnitTests(unittest.TestCase):
         self.assertNotEqual(loc, p)
         self.assertEqual(p, p.project(a))
 
+    def test_location_clone(self):
+        loc = self.location
+        self.assertFalse(hasattr(loc, '__dict__'))
+
+        clone = loc.clone()
+        self.assertEqual(loc, clone)
+        self.assertEqual(loc.time, clone.time)
+        self.assertEqual(type(loc), type(clone))
+
+        clone = loc.clone(latitude=1.0, timedelta=2, id=7)
+        self.assertAlmostEqual(1.0, clone.latitude)
+        self.assertAlmostEqual(loc.longitude, clone.longitude)
+        self.assertEqual(datetime.timedelta(seconds=2), clone.timedelta)
+        self.assertEqual(7, clone.id)
+
+        lazy = Location(self.latitude, self.longitude)
+        self.assertIsNone(lazy._time)
+        self.assertEqual(lazy.time, lazy.time)
+
+    def test_location_hash(self):
+        loc = self.location
+        self.assertEqual(hash(loc), hash(loc.clone()))
+        self.assertEqual(1, len({loc, loc.clone(), loc.clone(time=None)}))
+        self.assertNotEqual(loc, loc.next())
+        self.assertNotEqual(loc, None)
+
+        cache = {g: g.id for g in self.locations}
+        self.assertEqual(len(self.locations), len(cache))
+        self.assertEqual(11, cache[self.locations[2].clone()])
+
+        unique = Location.unique(*self.locations, *self.locations)
+        self.assertTupleEqual(tuple(self.locations), unique)
+
+        near = loc.next(0.1)
+        self.assertNotEqual(loc.key(), near.key())
+        self.assertEqual(2, len(Location.unique(loc, near)))
+        self.assertEqual(1, len(Location.unique(loc, near, tolerance=10.)))
+
+    def test_location_array(self):
+        arr = LocationArray.from_locations(*self.locations)
+        self.assertEqual(len(self.locations), len(arr))
+        self.assertTupleEqual(tuple(self.locations), arr.locations)
+        self.assertEqual(self.locations[3], arr[3])
+        self.assertEqual(3, len(arr[2:5]))
+
+        for d, loc in zip(arr.dist(self.location), self.locations):
+            self.assertAlmostEqual(loc.dist(self.location), d)
+        for d, loc in zip(arr.dir(self.location), self.locations):
+            self.assertAlmostEqual(loc.dir(self.location), d)
+
+        for n, loc in zip(arr.next(), self.locations):
+            self.assertEqual(loc.next(), n)
+            self.assertEqual(loc.next().time, n.time)
+
+        diff = arr[:-1].diff(arr[1:])
+        for d, s, e in zip(diff, self.locations[:-1], self.locations[1:]):
+            loc = s.diff(e)
+            self.assertAlmostEqual(loc.latitude, d.latitude)
+            self.assertAlmostEqual(float(loc.speed), float(d.speed))
+            self.assertAlmostEqual(loc.direction, d.direction)
+            self.assertAlmostEqual(loc.timedelta, d.timedelta)
+
+    def test_rollout(self):
+        loc = self.location
+        times = [0.5 * i for i in range(1, 21)]
+        trajectory = loc.rollout(times)
+        self.assertEqual(len(times), len(trajectory))
+        for t, g in zip(times, trajectory):
+            n = loc.next(timedelta=t)
+            self.assertAlmostEqual(n.latitude, g.latitude)
+            self.assertAlmostEqual(n.longitude, g.longitude)
+            self.assertEqual(n.time, g.time)
+            self.assertEqual(loc.speed, g.speed)
+            self.assertAlmostEqual(loc.direction, g.direction)
+
+        distances = [10. * i for i in range(1, 21)]
+        trajectory = loc.rollout(distances=distances)
+        for d, g in zip(distances, trajectory):
+            self.assertAlmostEqual(d, loc.dist(g))
+
+        # constant turn rate at constant speed against small steps
+        frame = LocalFrame(loc)
+        trajectory = loc.rollout(times, turn_rate=10., geometry='tangent')
+        step, g = 0.005, loc
+        for t, r in zip(times, trajectory):
+            while g.time < r.time:
+                h = g.direction
+                g = g.next(timedelta=step, geometry='tangent',
+                           direction=h + 10. * step / 2)
+                g = g.clone(direction=h + 10. * step)
+            self.assertAlmostEqual(0., frame.dist(g, r), places=2)
+            self.assertAlmostEqual(g.direction % 360., r.direction)
+
+        # accelerate and stop
+        trajectory = loc.rollout(times, acceleration=1.)
+        for t, g in zip(times, trajectory):
+            self.assertAlmostEqual(float(loc.speed) + t, g.speed)
+        v = float(loc.speed)
+        trajectory = loc.rollout(times + [100.], acceleration=-v / 5.)
+        self.assertAlmostEqual(0., trajectory.speed[-1])
+        self.assertAlmostEqual(v * 5. / 2., loc.dist(trajectory[-1]))
+        self.assertAlmostEqual(0., trajectory[-1].dist(trajectory[-2]))
+        trajectory = loc.rollout(distances=[1000.], acceleration=-v / 5.)
+        self.assertAlmostEqual(v * 5. / 2., loc.dist(trajectory[0]))
+
+        self.assertRaises(ValueError, loc.rollout)
+        self.assertRaises(ValueError, Location().rollout, distances=[1.])
+
+    def test_subclass_geometry(self):
+        class SphericalLocation(Location):
+            geometry = 'haversine'
+
+        class DoubleLocation(Location):
+            @classmethod
+            def xy(cls, latitude, longitude, distance, direction):
+                return Location.xy(latitude, longitude, 2 * distance,
+                                   direction)
+
+        for cls in SphericalLocation, DoubleLocation:
+            loc = cls(49.8670, 8.6380, speed=10., direction=30.)
+            trajectory = loc.rollout((1., 2.))
+            for t, g in zip((1., 2.), trajectory):
+                n = loc.next(timedelta=t)
+                self.assertAlmostEqual(n.latitude, g.latitude)
+                self.assertAlmostEqual(n.longitude, g.longitude)
+
+    def test_lazy_time(self):
+        untimed = Location(49.8670, 8.6380)
+        self.assertEqual(untimed.time, untimed.clone().time)
+        a, b = Location(49.8670, 8.6380), Location(49.8680, 8.6380)
+        delta = a.diff(b)
+        self.assertLessEqual(datetime.timedelta(), delta.timedelta)
+        self.assertLessEqual(0.0, float(delta.speed))
+        way = Way(geometry=(Location(49.8670, 8.6380),
+                            Location(49.8680, 8.6380)))
+        self.assertLessEqual(datetime.timedelta(), way.duration)
+
+    def test_codec(self):
+        arr = LocationArray.from_locations(*self.locations)
+        for delta in (False, True):
+            for compress in (False, True, 9):
+                data = dumps(self.locations, delta=delta, compress=compress)
+                self.assertEqual(data, dumps(arr, delta, compress))
+                other = loads(data)
+                self.assertEqual(len(arr), len(other))
+                for a, b in zip(self.locations, other):
+                    self.assertAlmostEqual(a.latitude, b.latitude, places=6)
+                    self.assertAlmostEqual(a.longitude, b.longitude, places=6)
+                    self.assertEqual(a.speed, b.speed)
+                    self.assertEqual(a.direction, b.direction)
+                    self.assertEqual(a.timedelta, b.timedelta)
+                    self.assertEqual(a.time, b.time)
+                    self.assertEqual(a.id, b.id)
+                    if not delta:
+                        self.assertEqual(a, b)
+
+        data = dumps(arr)
+        self.assertIs(loads(data).latitude.base.obj, data)
+        self.assertEqual(0, len(loads(dumps(()))))
+        self.assertEqual(0, len(loads(dumps((), delta=True))))
+        self.assertRaises(ValueError, loads, b'JSON' + data[4:])
+        self.assertRaises(ValueError, loads, data[:4] + b'\xff' + data[5:])
+
+        with tempfile.TemporaryDirectory() as path:
+            file = os.path.join(path, 'track.clmt')
+            dump(self.locations, file, compress=True)
+            self.assertTupleEqual(tuple(self.locations), load(file).locations)
+            open(file, 'wb').close()
+            self.assertRaises(ValueError, load, file)
+        self.assertRaises(ValueError, loads, b'')
+
+        # jumps across the antimeridian do not overflow deltas
+        jump = (Location(10., 179.9), Location(10.1, -179.9),
+                Location(10.2, 179.8))
+        data = dumps(jump, delta=True)
+        self.assertEqual(dumps(jump), data)
+        for a, b in zip(jump, loads(data)):
+            self.assertEqual(a.coordinate, b.coordinate)
+        short = (Location(10., 179.9), Location(10.1, 150.))
+        self.assertNotEqual(dumps(short), dumps(short, delta=True))
+
     def test_boundary(self):
         radius = 123.45
         inner_left, inner_right = Location.boundary(*self.locations)
@@ -192,6 +512,50 @@ class FirstUnitTests(unittest.TestCase):
         other_left, other_right = Location.boundary(inner_left, radius=radius)
         self.assertEqual(outer_left, other_left)
 
+    def test_bounds(self):
+        radius = 123.45
+        south, west, north, east = Location.bounds(*self.locations)
+        sw, ne = Location.boundary(*self.locations)
+        self.assertEqual((south, west), sw.coordinate)
+        self.assertEqual((north, east), ne.coordinate)
+
+        bounds = Location.bounds(*self.locations, radius=radius)
+        sw, ne = Location.boundary(*self.locations, radius=radius)
+        self.assertEqual(bounds, sw.coordinate + ne.coordinate)
+        self.assertEqual(Location.center(*self.locations, radius=radius),
+                         Location.center(bounds=bounds))
+        self.assertEqual(Location.diameter(*self.locations, radius=radius),
+                         Location.diameter(bounds=bounds))
+
+        arr = LocationArray.from_locations(*self.locations)
+        for a, b in zip(bounds, arr.bounds(radius=radius)):
+            self.assertAlmostEqual(a, b)
+
+        offsets = 0, 4, 5
+        groups = self.locations[:4], self.locations[4:5], self.locations[5:]
+        many = arr.bounds(radius=radius, offsets=offsets)
+        for i, group in enumerate(groups):
+            bounds = Location.bounds(*group, radius=radius)
+            for a, b in zip(bounds, many):
+                self.assertAlmostEqual(a, b[i])
+
+        # empty groups and trailing total as in WayTable().offsets
+        n = len(self.locations)
+        many = arr.bounds(offsets=(0, 0, 4, 4, 5, n))
+        self.assertEqual(5, len(many[0]))
+        for i in 0, 2:
+            self.assertTrue(all(np.isnan(b[i]) for b in many))
+        for i, group in zip((1, 3, 4), groups):
+            bounds = Location.bounds(*group)
+            for a, b in zip(bounds, many):
+                self.assertAlmostEqual(a, b[i])
+
+        way = Way(geometry=self.locations)
+        self.assertEqual(Location.bounds(*self.locations), way.bounds)
+        self.assertIs(way.bounds, way.bounds)
+        self.assertIsNone(Way().bounds)
+        self.assertFalse(self.location in Way())
+
     def test_ways(self):
         way = Way(id=111, limit=float(self.speed))
         way.geometry = self.locations
@@ -212,11 +576,399 @@ class FirstUnitTests(unittest.TestCase):
         dx, dy = way.diameter
         self.assertAlmostEqual(75294.94509969912, dx)
         self.assertAlmostEqual(20798.711020833827, dy)
-        length = way.length
+        length = sum(s.dist(e)
+                     for s, e in zip(way.geometry[:-1], way.geometry[1:]))
         duration = way.duration
         self.assertAlmostEqual(92511.01945196062, length)
+        self.assertAlmostEqual(way.distances[-1], way.length)
         self.assertEqual(datetime.timedelta(seconds=2432), duration)
 
+    def test_way_lazy(self):
+        payload = Way(id=111, geometry=self.locations)._dict
+        payload['nodes'] = list(range(1, len(self.locations) + 1))
+        way = Way(**payload)
+        self.assertIsNone(way._geometry)
+        self.assertIsNone(way._segments)
+        self.assertEqual(len(self.locations), len(way))
+        self.assertIsNone(way._geometry)
+
+        segments = way.segments
+        self.assertEqual(len(way) - 1, len(segments))
+        self.assertIs(segments, way.segments)
+        self.assertIs(way.geometry, way.geometry)
+        self.assertEqual(way, Way(**payload))
+        self.assertNotEqual(way, Way(id=111, geometry=self.locations))
+        self.assertRaises(ValueError, setattr, way, 'geometry', ())
+
+        # mismatching node ids are found without building locations
+        payload['geometry'][1]['id'] = 3
+        self.assertRaises(ValueError, lambda: Way(**payload))
+        geometry = LocationArray.from_locations(*way.geometry)
+        geometry = LocationArray(geometry.latitude, geometry.longitude,
+                                 id=payload['nodes'][::-1])
+        self.assertRaises(ValueError, Way, id=111, geometry=geometry,
+                          nodes=payload['nodes'])
+
+    def test_way_hash(self):
+        way = Way(id=111, limit=30., geometry=self.locations)
+        same = Way(**way._dict)
+        self.assertIsNone(same._geometry)
+        self.assertEqual(way.digest, same.digest)
+        self.assertIs(way.digest, way.digest)
+        self.assertEqual(way, same)
+        self.assertEqual(hash(way), hash(same))
+        self.assertEqual(1, len({way, same}))
+        self.assertIsNone(same._geometry)
+
+        self.assertNotEqual(way, Way(id=112, limit=30.,
+                                     geometry=self.locations))
+        self.assertNotEqual(way, Way(id=111, limit=50.,
+                                     geometry=self.locations))
+        self.assertNotEqual(way, Way(id=111, limit=30.,
+                                     geometry=self.locations[1:]))
+        self.assertNotEqual(way, way.json)
+        self.assertEqual(Way(), Way())
+
+        # nodes and tags are part of the content
+        nodes = tuple(range(1, len(self.locations) + 1))
+        payload = dict(way._dict, nodes=nodes, tags={'highway': 'primary'})
+        self.assertEqual(Way(**payload), Way(**payload))
+        self.assertNotEqual(way, Way(**dict(payload, tags={})))
+        self.assertNotEqual(Way(**payload), Way(**dict(payload, tags={})))
+        self.assertNotEqual(Way(**payload),
+                            Way(**dict(payload, nodes=nodes[::-1])))
+
+        empty = Way(id=111)
+        digest = empty.digest
+        empty.geometry = self.locations
+        self.assertNotEqual(digest, empty.digest)
+
+    def test_way_registry(self):
+        registry = WayRegistry(maxsize=3)
+        payload = [Way(id=i, geometry=self.locations[i:i + 3])._dict
+                   for i in range(5)]
+        first = registry(payload[:3])
+        self.assertEqual(3, len(registry))
+        second = registry(payload[1:4])
+        self.assertIs(first[1], second[0])
+        self.assertIs(first[2], second[1])
+        self.assertEqual((2, 4), (registry.hits, registry.misses))
+        self.assertEqual(3, len(registry))
+        self.assertNotIn(first[0], registry)
+        self.assertIn(second[2], registry)
+
+        # least recently used is dropped
+        registry.intern(first[1])
+        registry.intern(payload[4])
+        self.assertIn(first[1], registry)
+        self.assertNotIn(first[2], registry)
+
+        changed = dict(payload[1], limit=50.)
+        self.assertIsNot(first[1], registry.intern(changed))
+        registry.clear()
+        self.assertEqual(0, len(registry))
+
+    def test_way_graph(self):
+        size, ways = 6, list()
+        for r in range(size):
+            for c in range(size - 1):
+                ways.append(Way(id=len(ways) + 1, oneway=r % 3 == 0,
+                                nodes=(r * size + c, r * size + c + 1)))
+                ways.append(Way(id=len(ways) + 1, oneway=r % 3 == 1,
+                                nodes=(c * size + r, (c + 1) * size + r)))
+        graph = WayGraph(ways)
+        self.assertEqual(len(ways), len(graph))
+
+        for way in ways:
+            self.assertIn(way, graph)
+            exits = way.nodes[1:] if way.oneway else way.nodes
+            expected = tuple(w for w in ways if w is not way and set(
+                w.nodes[:-1] if w.oneway else w.nodes).intersection(exits))
+            self.assertTupleEqual(expected, graph.successors(way))
+            self.assertTupleEqual(expected, graph.successors(way.id))
+            for node in way.nodes:
+                self.assertIn(way, graph.ways_at(node))
+
+        levels = graph.bfs(ways[0], depth=3)
+        self.assertEqual((ways[0],), levels[0])
+        self.assertTupleEqual(graph.successors(ways[0]), levels[1])
+        reached = [w for level in levels for w in level]
+        self.assertEqual(len(reached), len(set(reached)))
+        for level, nxt in zip(levels[:-1], levels[1:]):
+            succ = set(s for w in level for s in graph.successors(w))
+            self.assertTrue(set(nxt).issubset(succ))
+
+        def score(path):
+            return -abs(path[-1].id - 30)
+
+        paths = graph.beam(ways[0], score, depth=4, width=3)
+        self.assertEqual(3, len(paths))
+        for path in paths:
+            self.assertEqual(ways[0], path[0])
+            for a, b in zip(path[:-1], path[1:]):
+                self.assertIn(b, graph.successors(a))
+        self.assertEqual(sorted(paths, key=score, reverse=True), list(paths))
+
+        self.assertEqual((), graph.ways_at(-1))
+
+        # oneway to oneway and oneway to two-way
+        a = Way(id=1, nodes=(1, 2), oneway=True)
+        b = Way(id=2, nodes=(2, 3), oneway=True)
+        c = Way(id=3, nodes=(3, 2), oneway=True)
+        d = Way(id=4, nodes=(0, 1, 5))
+        e = Way(id=5, nodes=(2, 7, 8))
+        graph = WayGraph((a, b, c, d, e))
+        self.assertEqual((b, e), graph.successors(a))
+        self.assertEqual((c,), graph.successors(b))
+        self.assertEqual((b, e), graph.successors(c))
+        self.assertEqual((a,), graph.successors(d))
+        self.assertEqual((b,), graph.successors(e))
+        self.assertRaises(KeyError, graph.successors, 999)
+        self.assertEqual(0, len(WayGraph()))
+
+    def test_way_index(self):
+        rng = np.random.default_rng(1)
+        ways = list()
+        for i in range(200):
+            lat = 49.87 + rng.uniform(-0.02, 0.02) + \
+                np.cumsum(rng.uniform(-1e-3, 1e-3, 1 + i % 5))
+            lon = 8.64 + rng.uniform(-0.03, 0.03) + \
+                np.cumsum(rng.uniform(-1e-3, 1e-3, 1 + i % 5))
+            ways.append(Way(id=i + 1, geometry=[
+                {'latitude': a, 'longitude': b} for a, b in zip(lat, lon)]))
+        index = WayIndex(ways + [Way()], cell=200.)
+        self.assertEqual(len(ways), len(index))
+
+        south, west, north, east = 49.865, 8.63, 49.875, 8.65
+        expected = [w for w in ways if w.bounds[0] <= north and
+                    south <= w.bounds[2] and w.bounds[1] <= east and
+                    west <= w.bounds[3]]
+        self.assertEqual(expected, list(index.bbox(south, west, north, east)))
+        self.assertEqual((), index.bbox(0., 0., 1., 1.))
+
+        for loc in self.locations[:3] + [Location(49.87, 8.64)]:
+            frame = LocalFrame(loc)
+            dists = dict()
+            for w in ways:
+                _, _, d, _ = w.project(loc, frame)
+                dists[w] = d
+            expected = sorted((w for w in ways if dists[w] <= 300.),
+                              key=dists.get)
+            self.assertEqual(expected, list(index.radius(loc, 300.)))
+
+            segments = list()
+            for w in ways:
+                pairs = tuple(zip(w[:-1], w[1:])) or ((w[0], w[0]),)
+                segments.extend(frame.dist(loc, loc.project(
+                    a, b, segment=True, frame=frame)) for a, b in pairs)
+            nearest = index.nearest(loc, k=5)
+            self.assertEqual(5, len(nearest))
+            for (w, j, d), e in zip(nearest, sorted(segments)):
+                self.assertAlmostEqual(e, d)
+                a, b = w[j], w[min(j + 1, len(w) - 1)]
+                p = loc.project(a, b, segment=True, frame=frame)
+                self.assertAlmostEqual(frame.dist(loc, p), d)
+
+        self.assertEqual(len(segments),
+                         len(index.nearest(self.location, 999)))
+        self.assertEqual((), WayIndex().nearest(self.location))
+        self.assertEqual((), WayIndex().bbox(south, west, north, east))
+
+    def test_segment_index(self):
+        a = Location(49.86, 8.60)
+        motorway = Way(id=1, geometry=[a.next(i * 2000., 80.)
+                                       for i in range(20)])
+        ways = [motorway] + [Way(id=i + 2, geometry=(
+            g.next(30., 0.), g.next(30., 0.).next(100., 10.)))
+            for i, g in enumerate(motorway[::3])]
+        index = SegmentIndex(ways, cell=100.)
+        way_index = WayIndex(ways, cell=100.)
+        self.assertEqual(len(ways), len(index))
+        self.assertIs(motorway, index.ways[0])
+
+        loc = motorway[10].next(5., 0.)
+        frame = LocalFrame(loc)
+        south, west, north, east = Location.bounds(loc, radius=50.)
+        self.assertEqual(((motorway, 9), (motorway, 10)),
+                         index.bbox(south, west, north, east))
+        self.assertEqual((motorway,),
+                         way_index.bbox(south, west, north, east))
+
+        found = index.radius(loc, 50.)
+        self.assertEqual([9, 10], sorted(j for _, j, _ in found))
+        for w, j, d in found:
+            p = loc.project(w[j], w[j + 1], segment=True, frame=frame)
+            self.assertAlmostEqual(frame.dist(loc, p), d)
+            self.assertLessEqual(d, 50.)
+        self.assertEqual(way_index.nearest(loc, k=3), index.nearest(loc, k=3))
+        far = motorway[0].next(3000., 270.)
+        self.assertEqual(way_index.nearest(far, k=3), index.nearest(far, k=3))
+        self.assertEqual((), SegmentIndex().radius(loc, 50.))
+
+    def test_way_simplify(self):
+        rng = np.random.default_rng(2)
+        track = [self.location]
+        for d in np.cumsum(rng.normal(0., 15., 299)):
+            track.append(track[-1].next(rng.uniform(5., 20.), 45. + d))
+        ids = range(1, len(track) + 1)
+        way = Way(id=7, nodes=ids, limit=50., geometry=[
+            {'latitude': g.latitude, 'longitude': g.longitude, 'id': i}
+            for g, i in zip(track, ids)])
+        frame = LocalFrame(way.coordinates[0].tolist())
+        last = len(way) + 1
+        for tolerance in (0.5, 5., 50.):
+            coarse = way.simplify(tolerance)
+            self.assertIs(coarse, way.simplify(tolerance))
+            self.assertLess(len(coarse), last)
+            last = len(coarse)
+            self.assertEqual((way.id, way.limit), (coarse.id, coarse.limit))
+            self.assertEqual(way.nodes[0], coarse.nodes[0])
+            self.assertEqual(way.nodes[-1], coarse.nodes[-1])
+            self.assertTrue(set(coarse.nodes).issubset(way.nodes))
+            self.assertEqual(sorted(coarse.nodes), list(coarse.nodes))
+            for n, g in zip(coarse.nodes, coarse.geometry):
+                self.assertEqual(n, g.id)
+            self.assertIsNone(way._geometry)
+            _, _, distance, _ = coarse.project(
+                LocationArray.from_locations(*track), frame)
+            self.assertLessEqual(distance.max(), tolerance + 1e-6)
+        self.assertIs(way, way.simplify(-1.))
+        self.assertEqual(0, len(Way().simplify()))
+
+    def test_way_table(self):
+        payload = [Way(id=i + 1, limit=10. * i, oneway=bool(i % 2),
+                       geometry=self.locations[i:i + 1 + i % 4])._dict
+                   for i in range(8)]
+        for i, w in enumerate(payload):
+            w['nodes'] = [10 * i + 1 + j for j in range(len(w['geometry']))]
+        payload.append({'id': 99})
+        table = WayTable(payload)
+        ways = tuple(Way(**w) for w in payload)
+        self.assertEqual(len(ways), len(table))
+        self.assertEqual([w.id for w in ways], table.ids.tolist())
+        self.assertEqual([w.oneway for w in ways], table.oneway.tolist())
+        self.assertTrue(isinstance(table.limits, SpeedArray))
+        self.assertEqual(sum(len(w) for w in ways), len(table.latitude))
+
+        for way, view in zip(ways, table):
+            self.assertEqual(way, view)
+            self.assertEqual(way.nodes, view.nodes)
+            self.assertEqual(way.limit, view.limit)
+            self.assertEqual(way.bounds, view.bounds)
+        for way, bounds in zip(ways[:-1], table.bounds[:-1]):
+            self.assertEqual(way.bounds, tuple(bounds))
+        self.assertTrue(np.isnan(table.bounds[-1]).all())
+        view = table[-2]
+        self.assertIsNone(view._geometry)
+        for a, b in zip(ways[-2].geometry, view.geometry):
+            self.assertEqual(a.coordinate, b.coordinate)
+        self.assertEqual(ways[-2].nodes, tuple(g.id for g in view.geometry))
+
+        again = WayTable(ways)
+        self.assertEqual(table.offsets.tolist(), again.offsets.tolist())
+        self.assertEqual(ways, again[:])
+        self.assertRaises(IndexError, table.__getitem__, len(table))
+        self.assertEqual(0, len(WayTable()))
+
+    def test_way_coordinates(self):
+        way = Way(id=111, geometry=self.locations)
+        lazy = Way(**way._dict)
+        coordinates = lazy.coordinates
+        self.assertIsNone(lazy._geometry)
+        self.assertEqual((len(way), 2), coordinates.shape)
+        self.assertIs(coordinates, lazy.coordinates)
+        self.assertEqual(way.bounds, lazy.bounds)
+        self.assertEqual(Location.bounds(*self.locations), way.bounds)
+
+        distances = way.distances
+        self.assertEqual(len(way), len(distances))
+        self.assertEqual(0.0, distances[0])
+        frame = LocalFrame(self.locations[0])
+        steps = [frame.dist(s, e)
+                 for s, e in zip(self.locations[:-1], self.locations[1:])]
+        for s, d in zip(np.cumsum([0.] + steps), distances):
+            self.assertAlmostEqual(s, d)
+        self.assertAlmostEqual(sum(steps), way.length)
+        self.assertAlmostEqual(sum(steps), lazy.length)
+        self.assertIs(distances, way.distances)
+        self.assertEqual(0.0, Way().length)
+
+    def test_way_locate(self):
+        way = Way(id=111, geometry=self.locations[::3])
+        distances = way.distances
+        for g, d in zip(way.geometry, distances):
+            self.assertAlmostEqual(d, way.locate(g), places=6)
+            p = way.interpolate(d)
+            self.assertAlmostEqual(g.latitude, p.latitude)
+            self.assertAlmostEqual(g.longitude, p.longitude)
+
+        measures = np.linspace(-10., distances[-1] + 10., 25)
+        arr = way.interpolate(measures)
+        self.assertEqual(len(measures), len(arr))
+        self.assertEqual(way[0].coordinate, arr[0].coordinate)
+        self.assertEqual(way[-1].coordinate, arr[-1].coordinate)
+        located = way.locate(arr)
+        inside = np.clip(measures, 0., distances[-1])
+        for m, loc, d in zip(inside, arr, located):
+            self.assertAlmostEqual(m, d, places=6)
+            self.assertAlmostEqual(m, way.locate(loc), places=6)
+            self.assertEqual(loc.coordinate, way.interpolate(m).coordinate)
+
+        # project, locate and interpolate measure in the same metric
+        index, offset, _, _ = way.project(arr)
+        for d, i, o in zip(located, index, offset):
+            self.assertAlmostEqual(d, distances[i] + o, places=6)
+        frame = LocalFrame(way.coordinates[0].tolist())
+        for loc, i in zip(arr, index):
+            self.assertAlmostEqual(frame.dir(way[i], way[i + 1]),
+                                   loc.direction)
+        east = Way(geometry=(self.location, self.location.next(500., 90.)))
+        for d in np.linspace(0., east.distances[-1], 11):
+            self.assertAlmostEqual(d, east.locate(east.interpolate(d)),
+                                   places=6)
+            index, offset, _, _ = east.project(east.interpolate(d))
+            self.assertAlmostEqual(d, east.distances[index] + offset,
+                                   places=6)
+
+        single = Way(geometry=self.locations[:1])
+        self.assertEqual(0.0, single.locate(self.locations[1]))
+        self.assertEqual(self.locations[0].coordinate,
+                         single.interpolate(5.).coordinate)
+        self.assertRaises(ValueError, Way().interpolate, 0.)
+        self.assertRaises(ValueError, Way().locate, self.location)
+
+    def test_way_project(self):
+        way = Way(id=111, geometry=self.locations[::3])
+        frame = LocalFrame(self.location)
+        track = [g.next(30., 90.).clone(direction=g.direction + 10.)
+                 for g in self.locations]
+
+        arr = LocationArray.from_locations(*track)
+        index, offset, distance, speed = way.project(arr, frame=frame)
+        self.assertEqual(len(track), len(index))
+
+        for loc, i, o, d, s in zip(track, index, offset, distance, speed):
+            self.assertTupleEqual((i, o, d, s), way.project(loc, frame))
+            # compare with looping over segments
+            pairs = zip(way.geometry[:-1], way.geometry[1:])
+            proj = [loc.project(a, b, segment=True, frame=frame)
+                    for a, b in pairs]
+            dists = [frame.dist(loc, p) for p in proj]
+            j = dists.index(min(dists))
+            self.assertEqual(j, i)
+            self.assertAlmostEqual(dists[j], d)
+            self.assertAlmostEqual(float(proj[j].speed), s)
+            self.assertAlmostEqual(frame.dist(way[j], proj[j]), o)
+
+        self.assertRaises(ValueError, Way().project, self.location)
+        index, offset, distance, speed = \
+            Way(geometry=self.locations[:1]).project(self.locations[1])
+        self.assertEqual(0, index)
+        self.assertAlmostEqual(0., offset)
+        self.assertAlmostEqual(
+            frame.dist(self.locations[0], self.locations[1]), distance,
+            places=2)
+
     def test_testing(self):
         locations = gpx(self.gpx_file_wo_time)
         self.assertEqual(57, len(locations))
@@ -266,6 +1018,283 @@ class FirstUnitTests(unittest.TestCase):
         self.assertTupleEqual(ways, ways_online)
 
 
+    def test_server(self):
+        payload = [Way(id=i + 1, limit=10. + i, geometry=(a, b))._dict
+                   for i, (a, b) in enumerate(zip(self.locations[:-1],
+                                                  self.locations[1:]))]
+        table = WayTable(payload)
+        with LimitsServer(payload, code='# get_limit') as server, \
+                Connection('colimit_test', url=server.url,
+                           port=server.port, pool_size=2) as ci:
+            self.assertTrue(ci.online)
+            self.assertEqual('# get_limit', ci.get_limit_code)
+
+            result = ci.get_ways(**self.llr_dict)
+            south, west, north, east = around(
+                *self.location.coordinate, self.radius)
+            s, w, n, e = table.bounds.T
+            inside = (s <= north) & (south <= n) & (w <= east) & (west <= e)
+            self.assertEqual(tuple(table[i] for i in inside.nonzero()[0]),
+                             result)
+            self.assertEqual(len(payload), len(ci.get_ways(**self.swne_dict)))
+            self.assertEqual(len(payload), len(ci.get_ways(table=True)))
+
+            loc = self.locations[3]
+            limit, ways = ci.get_limit(location=loc)
+            self.assertEqual(ways[0].limit, limit)
+            self.assertIn(ways[0], tuple(table))
+
+            # one session per thread sharing the pool
+            session = ci.session
+            self.assertIs(session, ci.session)
+            sessions = list()
+            thread = threading.Thread(
+                target=lambda: sessions.append(ci.get_ways() and ci.session))
+            thread.start()
+            thread.join()
+            self.assertIsNot(session, sessions[0])
+            self.assertIs(session.get_adapter(server.url),
+                          sessions[0].get_adapter(server.url))
+
+            # sessions of finished threads are not kept
+            del sessions[:]
+            for _ in range(5):
+                thread = threading.Thread(target=ci.get_ways)
+                thread.start()
+                thread.join()
+            gc.collect()
+            self.assertEqual([session], list(ci._sessions))
+
+            # server errors carry status and message
+            server._get_limit = lambda **kw: 1 / 0
+            with self.assertRaises(LimitsServerError) as error:
+                ci.get_limit(location=loc)
+            self.assertEqual(500, error.exception.status)
+            self.assertIn('division by zero', str(error.exception))
+            build_url, ci._build_url = ci._build_url, \
+                lambda mth: build_url('missing')
+            with self.assertRaises(LimitsServerError) as error:
+                ci._download()
+            self.assertEqual(404, error.exception.status)
+            ci._build_url = build_url
+        self.assertIsNot(session, ci.session)
+
+    def test_tile_cache(self):
+        payload = [Way(id=i + 1, limit=10. + i, geometry=(a, b))._dict
+                   for i, (a, b) in enumerate(zip(self.locations[:-1],
+                                                  self.locations[1:]))]
+        with LimitsServer(payload) as server, \
+                tempfile.TemporaryDirectory() as file_cache, \
+                Connection('colimit_test', url=server.url,
+                           port=server.port) as ci:
+            get_ways, calls = server.get_ways, list()
+            server.get_ways = lambda **kw: calls.append(kw) or get_ways(**kw)
+            for loc in self.locations[::3]:
+                kwargs = {'latitude': loc.latitude,
+                          'longitude': loc.longitude,
+                          'radius': self.radius}
+                result = ci.get_ways(**kwargs, file_cache=file_cache, zoom=16)
+                self.assertEqual(set(ci.get_ways(**kwargs)), set(result))
+            tiles = [f for f in os.listdir(file_cache)
+                     if f.startswith('tile_z16_')]
+            self.assertTrue(tiles)
+            # one download per query at most and none for cached tiles
+            downloads = len(calls) - len(self.locations[::3])
+            self.assertLessEqual(downloads, len(tiles))
+            self.assertLess(downloads, len(self.locations[::3]))
+            result = ci.get_ways(**self.swne_dict,
+                                 file_cache=file_cache, zoom=16)
+            n = len(calls)
+            self.assertEqual(result, ci.get_ways(
+                **self.swne_dict, file_cache=file_cache, zoom=16))
+            self.assertEqual(n, len(calls))
+
+        # radius reaches to the north, east, south and west
+        center = self.location
+        payload = [Way(id=i + 1, geometry=(
+            center.next(90., h, geometry='haversine'),
+            center.next(95., h, geometry='haversine')))._dict
+            for i, h in enumerate((0., 90., 180., 270.))]
+        with LimitsServer(payload) as server, \
+                tempfile.TemporaryDirectory() as file_cache, \
+                Connection('colimit_test', url=server.url,
+                           port=server.port) as ci:
+            kwargs = dict(latitude=center.latitude,
+                          longitude=center.longitude)
+            self.assertEqual(4, len(server.get_ways(
+                radius=100., **kwargs)['ways']))
+            self.assertEqual(0, len(server.get_ways(
+                radius=80., **kwargs)['ways']))
+            self.assertEqual(4, len(ci.get_ways(
+                radius=100., file_cache=file_cache, zoom=15, **kwargs)))
+
+    def test_way_cache(self):
+        ways = tuple(Way(id=i, geometry=(a, b)) for i, (a, b) in
+                     enumerate(zip(self.locations[:-1], self.locations[1:])))
+        calls = list()
+        cache = WayCache(maxsize=3)
+        get_ways = cache(lambda **kw: calls.append(kw) or ways[kw['id']:])
+        self.assertEqual(ways, get_ways(id=0))
+        self.assertIs(get_ways(id=0), get_ways(id=0, radius=None))
+        self.assertEqual((1, 2, 1), (len(calls), cache.hits, cache.misses))
+        for i in range(4):
+            get_ways(id=i)
+        self.assertEqual(3, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertNotIn(cache.key(id=0), cache)
+
+        # byte budget
+        cache = WayCache(maxbytes=9, sizeof=len)
+        get_ways = cache(lambda **kw: ways[kw['id']:])
+        get_ways(id=2)
+        get_ways(id=5)
+        self.assertEqual((1, 5), (len(cache), cache.nbytes))
+        get_ways(id=0)
+        self.assertEqual((1, 5), (len(cache), cache.nbytes))
+
+        # time to live
+        cache = WayCache(ttl=0.01)
+        cache.put('key', ways)
+        self.assertIs(ways, cache.get('key'))
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual((1, 1, 1), (cache.hits, cache.misses,
+                                     cache.evictions))
+
+        # in front of server and file cache
+        payload = [w.json for w in ways]
+        with LimitsServer(payload) as server, \
+                tempfile.TemporaryDirectory() as file_cache, \
+                Connection('colimit_test', url=server.url, port=server.port,
+                           cache=WayCache()) as ci:
+            get_ways, calls = server.get_ways, list()
+            server.get_ways = lambda **kw: calls.append(kw) or get_ways(**kw)
+            result = ci.get_ways(**self.llr_dict, file_cache=file_cache)
+            self.assertIs(result,
+                          ci.get_ways(**self.llr_dict, file_cache=file_cache))
+            self.assertEqual(1, len(calls))
+            self.assertEqual(1, ci.cache.hits)
+            result = ci.get_ways(**self.swne_dict, zoom=16)
+            self.assertIs(result, ci.get_ways(**self.swne_dict, zoom=16))
+            self.assertEqual(2, len(calls))
+            self.assertRaises(ValueError, ci.get_ways, zoom=16)
+
+        # way cache for get_ways given to get_limit code
+        calls, results = list(), list()
+        with tempfile.TemporaryDirectory() as path:
+            file = os.path.join(path, 'cached_get_limit.py')
+            with open(file, 'w') as f:
+                f.write('def get_limit(latitude, longitude, speed, '
+                        'direction, get_ways):\n'
+                        '    return 1.0, get_ways(latitude=49.87)\n')
+            test(self.locations[:4],
+                 lambda **kw: calls.append(kw) or ways,
+                 file,
+                 tester=lambda location, result, *args: results.append(
+                     result),
+                 way_cache=WayCache())
+        self.assertEqual(1, len(calls))
+        self.assertEqual([(1.0, ways)] * 4, results)
+
+        # expired tiles are downloaded again
+        with LimitsServer(payload) as server, \
+                Connection('colimit_test', url=server.url, port=server.port,
+                           cache=WayCache(ttl=0.)) as ci:
+            self.assertEqual(set(result),
+                             set(ci.get_ways(**self.swne_dict, zoom=16)))
+            self.assertEqual(set(result),
+                             set(ci.get_ways(**self.swne_dict, zoom=16)))
+
+    def test_get_limits(self):
+        calls, failed = list(), set()
+
+        locations = [Location(latitude=49.87 + i * 1e-4, longitude=8.64)
+                     for i in range(12)]
+
+        def get_limit(latitude, get_ways, **kwargs):
+            calls.append(latitude)
+            if latitude == locations[5].latitude and latitude not in failed:
+                failed.add(latitude)
+                raise ValueError('flaky')
+            return latitude, ()
+
+        with LimitsServer(get_limit=get_limit) as server, \
+                Connection('colimit_test', url=server.url,
+                           port=server.port) as ci:
+            results = ci.get_limits(iter(locations), chunk_size=4)
+            self.assertFalse(calls)
+            limits = [limit for limit, _ in results]
+            self.assertRaises(ValueError, ci.get_limits, locations, 0)
+        self.assertEqual([g.latitude for g in locations], limits)
+        # chunk of locations 4 to 7 failed at 5 and was retried one by one
+        self.assertEqual(len(locations) + 2, len(calls))
+
+        # locations failing on retry, too, do not stop the iteration
+        broken = locations[5].latitude
+
+        def get_broken_limit(latitude, get_ways, **kwargs):
+            if latitude == broken:
+                raise ValueError('flaky')
+            return latitude, ()
+
+        with LimitsServer(get_limit=get_broken_limit) as server, \
+                Connection('colimit_test', url=server.url,
+                           port=server.port) as ci:
+            results = list(ci.get_limits(locations, chunk_size=4))
+        self.assertEqual(len(locations), len(results))
+        self.assertIsInstance(results[5], LimitsServerError)
+        self.assertIn('flaky', str(results[5]))
+        self.assertEqual([g.latitude for g in locations if not
+                          g.latitude == broken],
+                         [limit for limit, _ in results[:5] + results[6:]])
+
+    def test_async_connection(self):
+        lock, running, seen = threading.Lock(), [0], [0]
+
+        def get_limit(latitude, longitude, get_ways, **kwargs):
+            with lock:
+                running[0] += 1
+                seen[0] = max(seen[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return latitude, ()
+
+        async def run(url, port, locations, concurrency):
+            async with AsyncConnection('colimit_test', url=url, port=port,
+                                       concurrency=concurrency) as ci:
+                limits = await ci.gather(locations)
+                ways = await ci.gather(locations[:2], radius=self.radius)
+            return limits, ways
+
+        locations = self.locations[:12]
+        with LimitsServer(get_limit=get_limit) as server:
+            limits, ways = asyncio.run(
+                run(server.url, server.port, locations, 4))
+        self.assertEqual([g.latitude for g in locations],
+                         [limit for limit, _ in limits])
+        self.assertEqual([(), ()], [tuple(w) for w in ways])
+        self.assertLess(1, seen[0])
+        self.assertLessEqual(seen[0], 4)
+
+        # given connection is not closed and loops are not kept
+        async def limit(ac, location):
+            return await ac.get_limit(location=location)
+
+        with LimitsServer(get_limit=get_limit) as server, \
+                Connection('colimit_test', url=server.url,
+                           port=server.port) as ci:
+            ac, closed, close = AsyncConnection(connection=ci), list(), ci.close
+            ci.close = lambda: closed.append(True) or close()
+            for loc in locations[:3]:
+                self.assertEqual((loc.latitude, ()),
+                                 asyncio.run(limit(ac, loc)))
+            gc.collect()
+            self.assertEqual(0, len(ac._semaphores))
+            ac.close()
+            self.assertFalse(closed)
+
+
 if __name__ == "__main__":
     start_time = datetime.datetime.now()
 